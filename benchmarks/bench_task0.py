@@ -0,0 +1,60 @@
+"""
+Сравнение построчного заполнения матрицы смежности (iterrows) с пакетным
+(factorize + fancy indexing) в task0.edges_to_adjacency_matrix.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_task0
+"""
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from task0.task0 import edges_to_adjacency_matrix
+
+
+def iterrows_adjacency_matrix(edges_csv):
+    """Прежняя реализация: одна запись в матрицу на строку DataFrame."""
+    edges = pd.read_csv(edges_csv, header=None, names=['from', 'to'])
+    nodes = sorted(set(edges['from']).union(edges['to']))
+    node_index = {node: i for i, node in enumerate(nodes)}
+
+    size = len(nodes)
+    adjacency_matrix = np.zeros((size, size), dtype=int)
+    for _, row in edges.iterrows():
+        from_idx = node_index[row['from']]
+        to_idx = node_index[row['to']]
+        adjacency_matrix[from_idx, to_idx] = 1
+        adjacency_matrix[to_idx, from_idx] = 1
+    return adjacency_matrix
+
+
+def random_edges_csv(n_edges, n_nodes, seed=0):
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(1, n_nodes + 1, size=(n_edges, 2))
+    return '\n'.join(f'{u},{v}' for u, v in pairs)
+
+
+def best_time(func, text, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(io.StringIO(text))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'edges':>8} {'iterrows, s':>12} {'batched, s':>12} {'speedup':>8}")
+    for n_edges in (1_000, 10_000, 100_000):
+        text = random_edges_csv(n_edges, n_nodes=2_000)
+        assert (iterrows_adjacency_matrix(io.StringIO(text)) ==
+                edges_to_adjacency_matrix(io.StringIO(text))).all()
+        slow = best_time(iterrows_adjacency_matrix, text, repeat=1)
+        fast = best_time(edges_to_adjacency_matrix, text)
+        print(f'{n_edges:>8} {slow:>12.4f} {fast:>12.4f} {slow / fast:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Масштабирование этапов find_core_and_consistent_ranking, которые раньше были
+квадратичными: номера пар ядра и их отметка в C (mark_core_pairs — прямо из
+np.nonzero, без поиска объектов) и сортировка кластеров (order_clusters вместо
+полного просмотра ранжировки).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_task3
+"""
+import time
+
+import numpy as np
+
+from task3.task3 import ParsedRanking, mark_core_pairs, order_clusters
+
+
+def random_ranking(rng, n_objects):
+    """Ранжировка 0..n-1: через один элемент — кластер из трех объектов."""
+    shuffled = rng.permutation(n_objects).tolist()
+    ranking = []
+    start = 0
+    while start < n_objects:
+        if len(ranking) % 2:
+            ranking.append(shuffled[start:start + 3])
+            start += 3
+        else:
+            ranking.append(shuffled[start])
+            start += 1
+    return ranking
+
+
+def core_matrices(n_objects, seed=0):
+    """P и C из find_core_and_consistent_ranking для двух случайных ранжировок."""
+    rng = np.random.default_rng(seed)
+    ranking_a = ParsedRanking(random_ranking(rng, n_objects))
+    ranking_b = ParsedRanking(random_ranking(rng, n_objects))
+    pos_a = ranking_a.object_positions
+    pos_b = ranking_b.positions_of(ranking_a)
+    Y_A = (pos_a[:, None] <= pos_a[None, :]).astype(int)
+    Y_B = (pos_b[:, None] <= pos_b[None, :]).astype(int)
+    P = (Y_A & Y_B.T) | (Y_A.T & Y_B)
+    return P, Y_A & Y_B
+
+
+def cluster_case(n_objects, cluster_size=10, seed=0):
+    """Кластеры по cluster_size объектов и две ранжировки, как их видит order_clusters."""
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(n_objects).tolist()
+    clusters = [sorted(shuffled[i:i + cluster_size]) for i in range(0, n_objects, cluster_size)]
+    return clusters, random_ranking(rng, n_objects), random_ranking(rng, n_objects)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'objects':>8} {'pairs':>10} {'core, s':>9} {'ns/cell':>8}")
+    for n_objects in (500, 1_000, 2_000, 4_000):
+        P, C = core_matrices(n_objects)
+        n_pairs = int(np.count_nonzero(np.triu(P == 0, k=1)))
+        core_time = timed(mark_core_pairs, P, C)
+        print(f'{n_objects:>8} {n_pairs:>10} {core_time:>9.3f} {core_time / n_objects ** 2 * 1e9:>8.1f}')
+        del P, C
+
+    print()
+    print(f"{'objects':>8} {'order, s':>9} {'ns/object':>10}")
+    for n_objects in (1_000, 10_000, 100_000, 1_000_000):
+        clusters, ranking_a, ranking_b = cluster_case(n_objects)
+        # Свежие ParsedRanking: словари первых позиций строятся внутри замера
+        order_time = timed(order_clusters, clusters, ParsedRanking(ranking_a), ParsedRanking(ranking_b))
+        print(f'{n_objects:>8} {order_time:>9.3f} {order_time / n_objects * 1e9:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
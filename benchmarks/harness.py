@@ -0,0 +1,270 @@
+"""
+Общий стенд производительности для task0-task3.
+
+Для каждой публичной точки входа и каждой формы входных данных (случайное
+дерево, длинная цепочка, широкая звезда, случайные кластерные ранжировки)
+замеряются время и пик памяти (tracemalloc) на размерах от 10 до 10^6.
+Размер перестает расти, как только один запуск превысил бюджет времени или
+достиг предела max_size точки входа (плотные матрицы n x n дальше не влезут
+в память); сам предел замеряется последней точкой. Для каждой серии
+считается наклон log(время) / log(n): около 1 — линейный рост, заметно
+больше 1 — сверхлинейный.
+
+Результаты сохраняются в JSON, чтобы сравнивать запуски между собой.
+
+Запуск из корня репозитория:
+    python -m benchmarks.harness -o bench_results.json
+    python -m benchmarks.harness --max-size 10000 --case task2.task
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from task0.task0 import edges_to_adjacency_matrix
+from task1 import task1
+from task2.task2 import StructureEntropy, rank_roots, task, task_batch
+from task3 import task3
+from task3.task3 import aggregate_rankings, find_core_and_consistent_ranking
+
+SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+TREE_SHAPES = ('random', 'chain', 'star')
+
+SUPERLINEAR_SLOPE = 1.2
+
+
+def random_tree_edges(n: int, seed: int = 0) -> List[Tuple[int, int]]:
+    """Случайное дерево: родитель узла i выбирается равномерно среди 0..i-1."""
+    rng = np.random.default_rng(seed)
+    parents = (rng.random(n - 1) * np.arange(1, n)).astype(np.int64)
+    return list(zip(parents.tolist(), range(1, n)))
+
+
+def chain_edges(n: int) -> List[Tuple[int, int]]:
+    """Цепочка 0 -> 1 -> ... -> n-1 (глубина n - 1)."""
+    return [(i - 1, i) for i in range(1, n)]
+
+
+def star_edges(n: int) -> List[Tuple[int, int]]:
+    """Звезда: корень 0 и n - 1 листьев."""
+    return [(0, i) for i in range(1, n)]
+
+
+TREE_GENERATORS: Dict[str, Callable[[int], List[Tuple[int, int]]]] = {
+    'random': random_tree_edges,
+    'chain': chain_edges,
+    'star': star_edges,
+}
+
+
+def clustered_ranking(n: int, seed: int = 0, max_cluster: int = 4) -> list:
+    """Случайная перестановка 1..n, разбитая на кластеры размера 1..max_cluster."""
+    rng = np.random.default_rng(seed)
+    objects = (rng.permutation(n) + 1).tolist()
+    sizes = rng.integers(1, max_cluster + 1, size=n).tolist()
+    ranking, i = [], 0
+    for size in sizes:
+        if i >= n:
+            break
+        cluster = objects[i:i + size]
+        ranking.append(cluster[0] if len(cluster) == 1 else cluster)
+        i += size
+    return ranking
+
+
+def edges_csv(edges: List[Tuple[int, int]]) -> str:
+    return '\n'.join(f'{u},{v}' for u, v in edges)
+
+
+@dataclass(frozen=True)
+class Case:
+    """
+    Точка входа для замера: setup(n, shape, workdir) готовит аргументы
+    (вне замера), func(*args) замеряется. max_size — предел размера для случая.
+    """
+    name: str
+    func: Callable
+    setup: Callable
+    shapes: Tuple[str, ...] = TREE_SHAPES
+    max_size: int = SIZES[-1]
+
+
+def _csv_file(n: int, shape: str, workdir: str) -> str:
+    path = os.path.join(workdir, f'{shape}_{n}.csv')
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(edges_csv(TREE_GENERATORS[shape](n)))
+    return path
+
+
+def _file_args(n, shape, workdir):
+    return (_csv_file(n, shape, workdir),)
+
+
+def _file_root_args(n, shape, workdir):
+    return (_csv_file(n, shape, workdir), '0')
+
+
+def _csv_root_args(n, shape, workdir):
+    return (edges_csv(TREE_GENERATORS[shape](n)), '0')
+
+
+def _memmap_args(n, shape, workdir):
+    return (_csv_file(n, shape, workdir), '0', None, False, False, None, None, os.path.join(workdir, 'memmap'))
+
+
+def _edges_args(n, shape, workdir):
+    return ([(str(u), str(v)) for u, v in TREE_GENERATORS[shape](n)],)
+
+
+def _batch_args(n, shape, workdir):
+    return ([(edges_csv(TREE_GENERATORS[shape](n)), '0')],)
+
+
+def _ranking_args(n, shape, workdir):
+    return (json.dumps(clustered_ranking(n, seed=1)), json.dumps(clustered_ranking(n, seed=2)))
+
+
+def _experts_args(n, shape, workdir):
+    return ([json.dumps(clustered_ranking(n, seed=seed)) for seed in range(3)],)
+
+
+def _export_args(n, shape, workdir):
+    return (_csv_file(n, shape, workdir), '0', None, False, False, os.path.join(workdir, 'export'))
+
+
+CASES = (
+    Case('task0.edges_to_adjacency_matrix', edges_to_adjacency_matrix, _file_args, max_size=5_000),
+    Case('task0.edges_to_adjacency_matrix[sparse]',
+         lambda path: edges_to_adjacency_matrix(path, sparse=True), _file_args),
+    Case('task1.main', task1.main, _file_root_args, max_size=2_000),
+    Case('task1.main[packed]', lambda path, root: task1.main(path, root, packed=True),
+         _file_root_args, max_size=20_000),
+    Case('task1.main[lazy]', lambda path, root: task1.main(path, root, lazy=True), _file_root_args),
+    Case('task1.main[export]', task1.main, _export_args, max_size=20_000),
+    Case('task1.main[memmap]', task1.main, _memmap_args, max_size=20_000),
+    Case('task1.all_roots', task1.all_roots, _edges_args, max_size=100_000),
+    Case('task2.task', task, _csv_root_args),
+    Case('task2.task_batch', task_batch, _batch_args),
+    Case('task2.StructureEntropy', StructureEntropy, _csv_root_args),
+    Case('task2.rank_roots', lambda s, e: rank_roots(s), _csv_root_args, max_size=100_000),
+    Case('task3.find_core_and_consistent_ranking', find_core_and_consistent_ranking,
+         _ranking_args, shapes=('clustered',), max_size=2_000),
+    Case('task3.find_core_and_consistent_ranking[count]',
+         lambda a, b: find_core_and_consistent_ranking(a, b, core='count'),
+         _ranking_args, shapes=('clustered',)),
+    Case('task3.aggregate_rankings', aggregate_rankings, _experts_args,
+         shapes=('clustered',), max_size=2_000),
+)
+
+
+def reset_caches() -> None:
+    """Очищает кэши уровня модулей (разбор ранжировок task3), чтобы вызов был холодным."""
+    task3._parse_cache.clear()
+
+
+def measure(func: Callable, args: tuple) -> Tuple[float, int]:
+    """
+    Время одного вызова и пик памяти Python-аллокаций (отдельным вызовом под
+    tracemalloc). Перед каждым вызовом кэши очищаются: иначе второй вызов
+    обслуживается из кэша разбора и пик памяти занижен.
+    """
+    reset_caches()
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+
+    reset_caches()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def slope(sizes: List[int], seconds: List[float]) -> float:
+    """Наклон прямой МНК для log(время) от log(n); nan, если точек меньше двух."""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, seconds) if t > 0]
+    if len(points) < 2:
+        return float('nan')
+    x = np.array([p[0] for p in points])
+    y = np.array([p[1] for p in points])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run(cases=CASES, sizes=SIZES, max_size: int = None, budget: float = 10.0,
+        verbose: bool = True) -> dict:
+    """
+    Замеряет все случаи на всех формах и размерах; возвращает словарь для JSON:
+    results — по строке на замер, series — наклоны по каждой серии (случай, форма).
+    """
+    results = []
+    series = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for case in cases:
+            for shape in case.shapes:
+                measured_sizes, measured_seconds = [], []
+                limit = min(case.max_size, max_size) if max_size is not None else case.max_size
+                # Последней точкой серии становится сам предел, если он между размерами
+                for n in sorted({min(n, limit) for n in sizes}):
+                    args = case.setup(n, shape, workdir)
+                    seconds, peak = measure(case.func, args)
+                    results.append({'case': case.name, 'shape': shape, 'n': n,
+                                    'seconds': seconds, 'peak_bytes': peak})
+                    measured_sizes.append(n)
+                    measured_seconds.append(seconds)
+                    if verbose:
+                        print(f'{case.name:<48} {shape:<9} {n:>8} {seconds:>10.4f} s '
+                              f'{peak / 2 ** 20:>10.1f} MiB', flush=True)
+                    if seconds > budget:
+                        break
+                # Наклон по размерам от 1000: на малых n доминируют постоянные расходы
+                tail = [i for i, n in enumerate(measured_sizes) if n >= 1_000]
+                fit = tail if len(tail) >= 2 else range(len(measured_sizes))
+                value = slope([measured_sizes[i] for i in fit], [measured_seconds[i] for i in fit])
+                series.append({'case': case.name, 'shape': shape, 'slope': value,
+                               'superlinear': bool(value > SUPERLINEAR_SLOPE)})
+    return {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                 'machine': platform.machine(), 'cpus': os.cpu_count(),
+                 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'budget': budget},
+        'results': results,
+        'series': series,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры времени и памяти task0-task3")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="файл JSON с результатами")
+    parser.add_argument('--max-size', type=int, help="наибольший размер n для всех случаев")
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help="секунд на один запуск, после которых размер больше не растет")
+    parser.add_argument('--case', action='append', help="замерять только случаи с этим префиксом имени")
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.case:
+        cases = tuple(case for case in CASES if any(case.name.startswith(prefix) for prefix in args.case))
+    report = run(cases, max_size=args.max_size, budget=args.budget)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print()
+    for item in report['series']:
+        mark = '  <- superlinear' if item['superlinear'] else ''
+        print(f"{item['case']:<48} {item['shape']:<9} slope {item['slope']:5.2f}{mark}")
+
+
+if __name__ == '__main__':
+    main()
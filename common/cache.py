@@ -0,0 +1,140 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+'''
+Кэш результатов разбора по содержимому входных данных.
+
+Ключ — хэш blake2b от содержимого (файла или строки) и параметров вызова,
+поэтому повторный вызов с тем же файлом пропускает чтение CSV и ориентацию
+дерева, даже если файл передан под другим именем, а измененный файл никогда
+не попадет на старую запись. В памяти хранится не больше maxsize записей,
+вытесняется давно не использованная (LRU). При заданном directory записи
+дополнительно сохраняются на диск (pickle) и переживают перезапуск процесса;
+на диске тоже не больше max_disk_entries файлов, вытесняются самые старые
+по времени последнего обращения.
+'''
+
+_READ_BLOCK = 1 << 20
+
+
+def content_key(*parts) -> str:
+    """Хэш набора частей: bytes берутся как есть, остальное — через str()."""
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+        # Длина перед частью, чтобы ('ab', 'c') и ('a', 'bc') давали разные ключи
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def file_digest(filename) -> str:
+    """Хэш содержимого файла, читаемого блоками по 1 МиБ."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """LRU-кэш в памяти с необязательным хранилищем на диске."""
+
+    def __init__(self, maxsize: int = 128, directory: Optional[str] = None,
+                 max_disk_entries: int = 1024):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or (self.directory is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.pkl')
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Значение по ключу: из памяти, затем с диска; default, если записи нет."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                os.utime(path)
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        """Сохраняет значение в памяти и, если задан directory, на диске."""
+        self._remember(key, value)
+        if self.directory is None:
+            return
+        # Запись во временный файл и атомарная замена: параллельный читатель
+        # не увидит недописанный файл
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._evict_disk()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Значение по ключу; при промахе вычисляет compute() и сохраняет результат."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Очищает память и дисковое хранилище."""
+        self._entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.unlink(os.path.join(self.directory, name))
+
+    def _evict_disk(self) -> None:
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.endswith('.pkl')]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,59 @@
+import json
+import os
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+'''
+Плотные матрицы n x n прямо в файлы .npy на диске для task0 и task1.
+
+Файл создается через np.lib.format.open_memmap (заголовок .npy и файл нужного
+размера без записи нулей), затем заполняется блоками строк: на каждый блок
+отображается только его участок файла (np.memmap со смещением), туда ставятся
+единицы, и отображение сбрасывается на диск и закрывается. Пиковая память —
+один блок (DEFAULT_BLOCK_BYTES) плюс одна строка номеров столбцов, независимо от n.
+Рядом пишется index.json с порядком узлов, формой, типом и файлами матриц.
+'''
+
+DEFAULT_BLOCK_BYTES = 1 << 26
+
+INDEX_FILE = 'index.json'
+
+
+def write_dense(path: str, n: int, row_columns: Callable[[int], Sequence[int]],
+                dtype=np.int8, block_bytes: int = DEFAULT_BLOCK_BYTES) -> np.memmap:
+    """
+    Записывает матрицу n x n в файл .npy: строка i — единицы в столбцах row_columns(i).
+    Возвращает матрицу, открытую только для чтения через np.load(mmap_mode='r').
+    """
+    dtype = np.dtype(dtype)
+    header = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n, n))
+    offset = header.offset
+    del header
+
+    row_bytes = max(n * dtype.itemsize, 1)
+    block_rows = max(1, block_bytes // row_bytes)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = np.memmap(path, dtype=dtype, mode='r+', offset=offset + start * row_bytes,
+                          shape=(stop - start, n))
+        for i in range(start, stop):
+            columns = row_columns(i)
+            if len(columns):
+                block[i - start, columns] = 1
+        block.flush()
+        del block
+    return np.load(path, mmap_mode='r')
+
+
+def write_index(directory: str, nodes: List, files: Dict[str, str], dtype=np.int8) -> str:
+    """index.json: порядок узлов (строки и столбцы), форма, тип и имена файлов матриц."""
+    path = os.path.join(directory, INDEX_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        # Метки из pandas/numpy (np.int64 и т.п.) приводятся к обычным типам Python
+        json.dump({'nodes': [node.item() if isinstance(node, np.generic) else node for node in nodes],
+                   'shape': [len(nodes), len(nodes)],
+                   'dtype': np.dtype(dtype).name,
+                   'files': {name: os.path.basename(file) for name, file in files.items()}},
+                  f, ensure_ascii=False)
+    return path
@@ -0,0 +1,97 @@
+import csv
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+'''
+Общий потоковый читатель списков ребер для task0 и task1.
+
+CSV читается блоками фиксированного размера, метки узлов сразу заменяются
+целыми номерами (int32), а словарь меток пополняется по мере чтения.
+Пиковая память на разбор файла ограничена размером блока, а не размером файла.
+'''
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class NodeInterner:
+    """
+    Инкрементальный словарь меток узлов: метка -> номер в порядке первого появления.
+    """
+
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {}
+        self.labels: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def intern(self, label: str) -> int:
+        """Возвращает номер метки, добавляя ее в словарь при первом появлении."""
+        code = self.index.get(label)
+        if code is None:
+            code = len(self.labels)
+            self.index[label] = code
+            self.labels.append(label)
+        return code
+
+
+def read_edge_chunks(filename, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     interner: Optional[NodeInterner] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Читает ребра из CSV-файла (путь или открытый текстовый файл) и выдает блоки
+    (src, dst) — массивы int32 длины не больше chunk_size с номерами узлов из interner.
+
+    Правила разбора совпадают с task1.read_edges_from_csv: значения обрезаются,
+    пустые строки, строки короче двух столбцов и пустые метки пропускаются.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if interner is None:
+        interner = NodeInterner()
+
+    if hasattr(filename, 'read'):
+        yield from _read_chunks(filename, chunk_size, interner)
+        return
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        yield from _read_chunks(csvfile, chunk_size, interner)
+
+
+def _read_chunks(csvfile, chunk_size: int, interner: NodeInterner) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    src = np.empty(chunk_size, dtype=np.int32)
+    dst = np.empty(chunk_size, dtype=np.int32)
+    filled = 0
+    intern = interner.intern
+    for row in csv.reader(csvfile):
+        if len(row) < 2:
+            continue
+        u, v = row[0].strip(), row[1].strip()
+        if u == '' or v == '':
+            continue
+        src[filled] = intern(u)
+        dst[filled] = intern(v)
+        filled += 1
+        if filled == chunk_size:
+            yield src.copy(), dst.copy()
+            filled = 0
+    if filled:
+        yield src[:filled].copy(), dst[:filled].copy()
+
+
+def read_edge_arrays(filename, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Читает весь файл блоками и склеивает их: (src, dst, labels).
+
+    В памяти остаются только массивы int32 (8 байт на ребро) и словарь меток,
+    без промежуточного списка кортежей строк.
+    """
+    interner = NodeInterner()
+    src_parts: List[np.ndarray] = []
+    dst_parts: List[np.ndarray] = []
+    for src, dst in read_edge_chunks(filename, chunk_size, interner):
+        src_parts.append(src)
+        dst_parts.append(dst)
+    if not src_parts:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty.copy(), interner.labels
+    return np.concatenate(src_parts), np.concatenate(dst_parts), interner.labels
@@ -0,0 +1,32 @@
+import math
+
+import numpy as np
+
+'''
+Структурная энтропия по числам связей (task1, task2).
+
+Вклад узла по одному отношению — H = -P * log2(P), P = l / (n - 1), где l —
+число связей узла; при l = 0 вклад нулевой. Нормировка — на H_ref = c * n * k,
+где c = 1 / (e * ln 2) — максимум -x * log2(x), k = 5 — число отношений r1-r5.
+'''
+
+# c = 1 / (e * ln 2): максимум -x * log2(x) на [0, 1]
+ENTROPY_SCALE = 1 / (math.e * math.log(2))
+
+# k — число отношений r1-r5
+RELATIONS_COUNT = 5
+
+
+def link_entropy(counts, max_possible_links) -> np.ndarray:
+    """
+    Поэлементно -P * log2(P) для P = counts / max_possible_links, 0 там, где counts = 0.
+    max_possible_links (n - 1) — число или массив, согласованный с counts по форме.
+    """
+    counts = np.asarray(counts)
+    P = counts / max_possible_links
+    return np.where(counts > 0, -P * np.log2(np.where(counts > 0, P, 1.0)), 0.0)
+
+
+def reference_entropy(n, k: int = RELATIONS_COUNT):
+    """H_ref = c * n * k для графа из n узлов (n — число или массив)."""
+    return ENTROPY_SCALE * n * k
@@ -0,0 +1,240 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from common.cache import ContentCache, content_key, file_digest
+from common.edges import DEFAULT_CHUNK_SIZE, NodeInterner, read_edge_arrays
+
+'''
+Общее компактное представление графа для task0, task1 и task2.
+
+Метки узлов заменяются номерами один раз (NodeInterner), дальше все хранится
+в массивах: ребра — парой массивов int32, ориентированное дерево — массивами
+родителя, смещений и номеров детей, глубины и размера поддерева. Это несколько
+int32 на узел вместо словарей и множеств строк.
+'''
+
+
+class CompactGraph:
+    """
+    Список ребер с номерами узлов: ребро k — src[k] -> dst[k], метка узла i — labels[i].
+
+    Неориентированная смежность в формате CSR (adjacency) строится по запросу:
+    соседи узла перечисляются в порядке появления ребер, как в build_tree.
+    """
+
+    def __init__(self, src: np.ndarray, dst: np.ndarray, labels: List[str]):
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.labels = labels
+        self._index: Optional[Dict[str, int]] = None
+        self._adjacency: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_pairs(cls, edges: Iterable[Tuple[str, str]], nodes: Sequence[str] = ()) -> 'CompactGraph':
+        """
+        Граф из пар меток. Узлы nodes получают номера первыми и в заданном порядке
+        (так можно зафиксировать порядок или добавить изолированные узлы), остальные
+        метки — в порядке первого появления в ребрах.
+        """
+        interner = NodeInterner()
+        for node in nodes:
+            interner.intern(node)
+        codes = [interner.intern(node) for edge in edges for node in edge]
+        codes = np.array(codes, dtype=np.int32).reshape(-1)
+        return cls(codes[0::2], codes[1::2], interner.labels)
+
+    @classmethod
+    def from_csv(cls, filename, chunk_size: int = DEFAULT_CHUNK_SIZE) -> 'CompactGraph':
+        """Граф из CSV-файла, прочитанного блоками (common.edges.read_edge_arrays)."""
+        src, dst, labels = read_edge_arrays(filename, chunk_size)
+        return cls(src, dst, labels)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.src)
+
+    def index(self, label: str) -> int:
+        """Номер узла по метке (KeyError, если метки нет)."""
+        if self._index is None:
+            self._index = {label: i for i, label in enumerate(self.labels)}
+        return self._index[label]
+
+    @property
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Неориентированная смежность (offsets, neighbors): соседи узла i —
+        neighbors[offsets[i]:offsets[i + 1]]. Ребро k дает записи src->dst и dst->src
+        на позициях 2k и 2k + 1, устойчивая сортировка сохраняет порядок появления.
+        """
+        if self._adjacency is None:
+            n = len(self.labels)
+            heads = np.empty(2 * self.n_edges, dtype=np.int32)
+            tails = np.empty(2 * self.n_edges, dtype=np.int32)
+            heads[0::2], heads[1::2] = self.src, self.dst
+            tails[0::2], tails[1::2] = self.dst, self.src
+            order = np.argsort(heads, kind='stable')
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(heads, minlength=n), out=offsets[1:])
+            self._adjacency = (offsets, tails[order])
+        return self._adjacency
+
+    def orient(self, root: int) -> 'CompactTree':
+        """
+        Дерево обхода в ширину из узла root по неориентированным ребрам, как в
+        task1.build_tree. Недостижимые из root узлы остаются без родителя и без детей.
+        """
+        n = len(self.labels)
+        offsets, neighbors = self.adjacency
+        offsets = offsets.tolist()
+        neighbors = neighbors.tolist()
+        parent = [-1] * n
+        visited = [False] * n
+        visited[root] = True
+        order = [root]
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                if not visited[neighbor]:
+                    visited[neighbor] = True
+                    parent[neighbor] = node
+                    order.append(neighbor)
+                    queue.append(neighbor)
+        # Дети в порядке обнаружения, т.е. в порядке order
+        return CompactTree(self.labels, parent, order)
+
+    def as_forest(self) -> Optional['CompactTree']:
+        """
+        Лес по ребрам src -> dst как они записаны. None, если у какого-то узла
+        больше одного родителя или в графе есть цикл.
+        """
+        n = len(self.labels)
+        if n and len(self.dst) and np.bincount(self.dst, minlength=n).max() > 1:
+            return None
+        parent = np.full(n, -1, dtype=np.int32)
+        parent[self.dst] = self.src
+        # Дети каждого узла — в порядке появления ребер
+        tree = CompactTree(self.labels, parent.tolist(), self.dst.tolist())
+        if len(tree.order) != n:
+            # Часть узлов не достижима из корней — в графе есть цикл
+            return None
+        return tree
+
+
+class CompactTree:
+    """
+    Ориентированный лес на массивах. Для узла i:
+      - parent[i] — номер родителя или -1;
+      - дети — child_index[child_offsets[i]:child_offsets[i + 1]];
+      - depth[i] — расстояние от корня, size[i] — размер поддерева (вместе с i).
+    order — обход в ширину от корней (родитель раньше детей); узлы, до которых
+    от корней не дойти (они лежат на цикле), в order не попадают.
+    """
+
+    def __init__(self, labels: List[str], parent: List[int], child_order: Sequence[int] = None):
+        """
+        parent — список родителей; child_order — последовательность узлов, задающая
+        порядок детей внутри каждого родителя (по умолчанию — по возрастанию номера).
+        """
+        n = len(labels)
+        self.labels = labels
+        if child_order is None:
+            child_order = range(n)
+        children: List[List[int]] = [[] for _ in range(n)]
+        for node in child_order:
+            if parent[node] >= 0:
+                children[parent[node]].append(node)
+
+        roots = [node for node in range(n) if parent[node] < 0]
+        depth = [0] * n
+        order = list(roots)
+        queue = deque(roots)
+        while queue:
+            node = queue.popleft()
+            for child in children[node]:
+                depth[child] = depth[node] + 1
+                order.append(child)
+                queue.append(child)
+
+        # Размеры поддеревьев — агрегация в обратном порядке обхода, без рекурсии
+        size = [1] * n
+        for node in reversed(order):
+            if parent[node] >= 0:
+                size[parent[node]] += size[node]
+
+        self.parent = np.array(parent, dtype=np.int32).reshape(-1)
+        self.child_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in children], out=self.child_offsets[1:])
+        self.child_index = np.array([child for c in children for child in c], dtype=np.int32).reshape(-1)
+        self.depth = np.array(depth, dtype=np.int32).reshape(-1)
+        self.size = np.array(size, dtype=np.int32).reshape(-1)
+        self.order = np.array(order, dtype=np.int32).reshape(-1)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def n_children(self) -> np.ndarray:
+        return np.diff(self.child_offsets)
+
+    def children(self, i: int) -> np.ndarray:
+        """Номера детей узла i."""
+        return self.child_index[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+    def relation_counts(self) -> np.ndarray:
+        """
+        Матрица (n, 5) чисел связей по r1-r5 для task2: дети, родитель, потомки
+        кроме детей, предки кроме родителя, братья.
+        """
+        n_children = self.n_children
+        has_parent = self.parent >= 0
+        counts = np.zeros((len(self.labels), 5), dtype=np.int64)
+        counts[:, 0] = n_children
+        counts[:, 1] = has_parent
+        counts[:, 2] = self.size - 1 - n_children
+        counts[:, 3] = np.maximum(self.depth - 1, 0)
+        counts[has_parent, 4] = n_children[self.parent[has_parent]] - 1
+        return counts
+
+    def permuted(self, order: Sequence[int]) -> 'CompactTree':
+        """
+        Тот же лес с другой нумерацией: новый узел k — это старый узел order[k].
+        Порядок детей внутри каждого родителя сохраняется.
+        """
+        n = len(self.labels)
+        new_index = np.empty(n, dtype=np.int64)
+        new_index[np.asarray(order, dtype=np.int64)] = np.arange(n)
+        has_parent = self.parent >= 0
+        parent = np.full(n, -1, dtype=np.int64)
+        parent[new_index[has_parent]] = new_index[self.parent[has_parent]]
+        return CompactTree([self.labels[i] for i in order], parent.tolist(),
+                           new_index[self.child_index].tolist())
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Словарь родитель -> список детей (метки), как task1.build_tree; ключи в порядке обхода."""
+        labels = self.labels
+        tree: Dict[str, List[str]] = {}
+        for node in self.order.tolist():
+            children = self.children(node)
+            if len(children):
+                tree[labels[node]] = [labels[child] for child in children.tolist()]
+        return tree
+
+
+def load_graph(filename, chunk_size: int = DEFAULT_CHUNK_SIZE, cache: Optional[ContentCache] = None,
+               digest: Optional[str] = None) -> CompactGraph:
+    """
+    CompactGraph.from_csv с кэшем по содержимому файла: при повторном вызове с тем же
+    содержимым CSV не читается. digest — уже посчитанный file_digest(filename).
+    """
+    if cache is None:
+        return CompactGraph.from_csv(filename, chunk_size)
+    if digest is None:
+        digest = file_digest(filename)
+    return cache.get_or_compute(content_key('CompactGraph', digest),
+                                lambda: CompactGraph.from_csv(filename, chunk_size))
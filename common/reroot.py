@@ -0,0 +1,249 @@
+from typing import Callable
+
+import numpy as np
+
+from common.entropy import link_entropy
+from common.graph import CompactGraph, CompactTree
+
+'''
+Расчеты «по всем корням» для неориентированного дерева.
+
+Если дерево подвесить за корень r, у каждого узла v ≠ r родителем становится
+сосед на пути к r. Поэтому все величины, зависящие только от самого узла —
+число детей, наличие родителя, размер поддерева, — меняются при переносе корня
+на соседний узел лишь у двух узлов, и сумма по узлам для всех корней
+пересчитывается за O(n) (перенос корня, rerooting).
+
+Глубина меняется у всех узлов сразу. Сумма sum_v f(dist(r, v)) для
+произвольной f считается центроидной декомпозицией: для каждого центроида
+вклад путей через него — корреляция гистограммы расстояний с f, вычисляемая
+через БПФ. Итого O(n log^2 n).
+'''
+
+# Ниже этого произведения длин свертка считается напрямую, выше — через БПФ
+_DIRECT_CONVOLVE = 1 << 16
+
+# Ветви не глубже этого обрабатываются все вместе, без отдельной свертки на каждую
+_SHALLOW_BRANCH = 8
+
+# Компоненты не больше этого не делятся дальше, а считаются обходом из каждого узла
+_SMALL_COMPONENT = 16
+
+
+def _correlate(counts: np.ndarray, f: np.ndarray, length: int) -> np.ndarray:
+    """G[t] = sum_k counts[k] * f[t + k] для t < length."""
+    segment = f[:length + len(counts) - 1]
+    if len(counts) * len(segment) <= _DIRECT_CONVOLVE:
+        full = np.convolve(segment, counts[::-1])
+    else:
+        size = 1 << (len(segment) + len(counts) - 2).bit_length()
+        full = np.fft.irfft(np.fft.rfft(segment, size) * np.fft.rfft(counts[::-1], size), size)
+    return full[len(counts) - 1:len(counts) - 1 + length]
+
+
+class RerootedTree:
+    """
+    Неориентированное дерево на CompactGraph, подвешенное за узел 0; по нему
+    считаются суммы по узлам сразу для всех n корней.
+
+    tree — CompactGraph.orient(0): parent, order (обход в ширину от узла 0) и size
+    (размеры поддеревьев при корне 0); degree — степени узлов. Если граф не дерево
+    (не n - 1 ребро или не связен), конструктор бросает ValueError.
+    """
+
+    def __init__(self, graph: CompactGraph):
+        n = len(graph)
+        if n and graph.n_edges != n - 1:
+            raise ValueError(f"Graph with {n} nodes and {graph.n_edges} edges is not a tree")
+        offsets, neighbors = graph.adjacency
+        self.graph = graph
+        self.degree = np.diff(offsets)
+        self._offsets = offsets.tolist()
+        self._neighbors = neighbors.tolist()
+        self.tree = graph.orient(0) if n else CompactTree([], [])
+        # Недостижимые из узла 0 узлы остаются корнями orient
+        if np.count_nonzero(self.tree.parent < 0) > 1:
+            raise ValueError("Graph is not connected, so it is not a tree")
+
+    def __len__(self) -> int:
+        return len(self.degree)
+
+    def _propagate(self, start, delta: np.ndarray) -> np.ndarray:
+        """S[0] = start, S[u] = S[parent[u]] + delta[u] вниз по обходу в ширину."""
+        if len(self) == 0:
+            return np.zeros(0, dtype=delta.dtype)
+        sums = [start] * len(self)
+        step = delta.tolist()
+        parent = self.tree.parent.tolist()
+        for node in self.tree.order[1:].tolist():
+            sums[node] = sums[parent[node]] + step[node]
+        return np.array(sums, dtype=delta.dtype)
+
+    def node_term_sums(self, term: Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Для каждого корня r — сумма term(children, has_parent, size) по всем узлам
+        дерева, подвешенного за r. term получает массивы int64 и возвращает массив
+        вкладов узлов; целочисленные вклады и суммируются точно, в int64. Время O(n).
+        """
+        n = len(self)
+        if n == 0:
+            return np.zeros(0)
+        degree = self.degree
+        root_term = np.asarray(term(degree, np.zeros(n, dtype=np.int64), np.full(n, n, dtype=np.int64)))
+        children = self.tree.order[1:]
+        parents = self.tree.parent[children]
+        size = self.tree.size[children].astype(np.int64)
+        ones = np.ones(n - 1, dtype=np.int64)
+        # Узел u, подвешенный за родителя при корне 0, и его родитель p,
+        # подвешенный за u (когда корень лежит в поддереве u)
+        down_term = np.zeros(n, dtype=root_term.dtype)
+        down_term[children] = term(degree[children] - 1, ones, size)
+        up_term = np.zeros(n, dtype=root_term.dtype)
+        up_term[children] = term(degree[parents] - 1, ones, n - size)
+
+        delta = np.zeros(n, dtype=root_term.dtype)
+        delta[children] = root_term[children] - down_term[children] + up_term[children] - root_term[parents]
+        return self._propagate((root_term[0] + down_term.sum()).item(), delta)
+
+    def distance_sums(self) -> np.ndarray:
+        """Сумма расстояний от каждого узла до всех остальных, O(n)."""
+        n = len(self)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        size = self.tree.size.astype(np.int64)
+        depth_sum = int(size.sum()) - n
+        delta = n - 2 * size
+        return self._propagate(depth_sum, delta)
+
+    def relation_entropy(self, descendants: Callable[[np.ndarray, np.ndarray], np.ndarray],
+                         ancestors: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Для каждого корня — структурная энтропия (common.entropy, без нормировки) по
+        числам связей узлов: дети, родитель, descendants(children, size) по r3,
+        ancestors(depth) по r4 и братья. task1 и task2 различаются только r3 и r4.
+        """
+        n = len(self)
+        if n <= 1:
+            return np.zeros(n)
+
+        def h(counts):
+            return link_entropy(counts, n - 1)
+
+        def node_entropy(children, has_parent, size):
+            # r1, r2, r3 узла и r5 его детей: у каждого из children детей children - 1 братьев
+            return h(children) + h(has_parent) + h(descendants(children, size)) + children * h(children - 1)
+
+        return self.node_term_sums(node_entropy) + self.distance_function_sums(h(ancestors(np.arange(n))))
+
+    def distance_function_sums(self, f: np.ndarray) -> np.ndarray:
+        """
+        Для каждого узла r — sum_v f[dist(r, v)] по всем узлам v (включая v = r).
+        f — массив длины не меньше n. Центроидная декомпозиция с корреляцией
+        через БПФ, O(n log^2 n).
+        """
+        n = len(self)
+        result = np.zeros(n)
+        if n == 0:
+            return result
+        # Пути «через центроид» внутри одной ветви длиннее настоящих и доходят до
+        # 2(n - 1); их вклад вычитается, значения f там не важны
+        f = np.concatenate([np.asarray(f[:n], dtype=float), np.zeros(max(n, 2 * _SHALLOW_BRANCH + 1))])
+        offsets, neighbors = self._offsets, self._neighbors
+        removed = [False] * n
+        parent = [-1] * n
+        size = [0] * n
+        width = _SHALLOW_BRANCH + 1
+        hankel = f[np.add.outer(np.arange(width), np.arange(width))]
+        f_list = f[:n].tolist()
+
+        pending = [0]
+        while pending:
+            start = pending.pop()
+            if all(removed[neighbor] for neighbor in neighbors[offsets[start]:offsets[start + 1]]):
+                # Компонента из одного узла: только путь нулевой длины
+                removed[start] = True
+                result[start] += f[0]
+                continue
+            # Компонента start без удаленных узлов и ее центроид
+            parent[start] = -1
+            component = [start]
+            for node in component:
+                for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                    if not removed[neighbor] and neighbor != parent[node]:
+                        parent[neighbor] = node
+                        component.append(neighbor)
+            for node in component:
+                size[node] = 1
+            for node in reversed(component[1:]):
+                size[parent[node]] += size[node]
+            if len(component) <= _SMALL_COMPONENT:
+                # Маленькая компонента: обход из каждого узла дешевле дальнейшего деления
+                members = set(component)
+                for source in component:
+                    seen = {source: 0}
+                    frontier = [source]
+                    for node in frontier:
+                        d = seen[node] + 1
+                        for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                            if neighbor in members and neighbor not in seen:
+                                seen[neighbor] = d
+                                frontier.append(neighbor)
+                    result[source] += sum(f_list[d] for d in seen.values())
+                for node in component:
+                    removed[node] = True
+                continue
+            half = len(component) // 2
+            centroid = start
+            while True:
+                heavy = [neighbor for neighbor in neighbors[offsets[centroid]:offsets[centroid + 1]]
+                         if not removed[neighbor] and neighbor != parent[centroid] and size[neighbor] > half]
+                if not heavy:
+                    break
+                centroid = heavy[0]
+
+            # Обход компоненты от центроида: расстояние и номер ветви каждого узла
+            removed[centroid] = True
+            parent[centroid] = -1
+            nodes = [centroid]
+            dist = [0]
+            branch = [-1]
+            n_branches = 0
+            for i, node in enumerate(nodes):
+                for neighbor in neighbors[offsets[node]:offsets[node + 1]]:
+                    if not removed[neighbor] and neighbor != parent[node]:
+                        parent[neighbor] = node
+                        nodes.append(neighbor)
+                        dist.append(dist[i] + 1)
+                        if i == 0:
+                            branch.append(n_branches)
+                            n_branches += 1
+                            pending.append(neighbor)
+                        else:
+                            branch.append(branch[i])
+            nodes = np.array(nodes, dtype=np.int64)
+            dist = np.array(dist, dtype=np.int64)
+            branch = np.array(branch, dtype=np.int64)
+
+            # Все пути через центроид, включая пары из одной ветви
+            counts = np.bincount(dist).astype(float)
+            result[nodes] += _correlate(counts, f, len(counts))[dist]
+
+            # Пары из одной ветви вычитаются. Неглубокие ветви — одним матричным
+            # произведением: гистограммы (ветвь, расстояние) на матрицу f[t + k]
+            nodes, dist, branch = nodes[1:], dist[1:], branch[1:]
+            depth = np.zeros(n_branches, dtype=np.int64)
+            np.maximum.at(depth, branch, dist)
+            shallow = depth[branch] <= _SHALLOW_BRANCH
+            if shallow.any():
+                histogram = np.bincount(branch[shallow] * width + dist[shallow],
+                                        minlength=n_branches * width).reshape(n_branches, width)
+                result[nodes[shallow]] -= (histogram @ hankel)[branch[shallow], dist[shallow]]
+            deep = np.flatnonzero(~shallow)
+            deep = deep[np.argsort(branch[deep], kind='stable')]
+            for members in np.split(deep, np.flatnonzero(np.diff(branch[deep])) + 1):
+                if len(members) == 0:
+                    continue
+                branch_dist = dist[members]
+                counts = np.bincount(branch_dist).astype(float)
+                result[nodes[members]] -= _correlate(counts, f, len(counts))[branch_dist]
+        return result
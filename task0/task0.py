@@ -1,26 +1,176 @@
-import pandas as pd 
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pandas as pd
 import numpy as np
 
-def edges_to_adjacency_matrix(edges_csv):
-    edges = pd.read_csv(edges_csv, header=None, names=['from', 'to'])
-    nodes = sorted(set(edges['from']).union(edges['to']))
-    node_index = {node: i for i, node in enumerate(nodes)}
+from common.cache import ContentCache, content_key, file_digest
+from common.dense import write_dense, write_index
+from common.graph import CompactGraph, load_graph
+
+
+@dataclass(frozen=True)
+class SparseAdjacency:
+    """
+    Разреженная (CSR) матрица смежности без хранения значений — все ненулевые равны 1.
+
+    Поля:
+      - indptr: массив длины n + 1, соседи узла i лежат в indices[indptr[i]:indptr[i + 1]]
+      - indices: номера столбцов ненулевых элементов, отсортированы внутри строки
+      - nodes: таблица меток узлов, nodes[i] — метка строки/столбца i
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+    nodes: List
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.nodes), len(self.nodes)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        """Номера соседей узла с номером i."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def to_coo(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Возвращает пару массивов (rows, cols) ненулевых элементов."""
+        rows = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        return rows, self.indices.copy()
+
+    def to_dense(self) -> np.ndarray:
+        """Плотная матрица в том же формате, что возвращает edges_to_adjacency_matrix."""
+        size = len(self.nodes)
+        adjacency_matrix = np.zeros((size, size), dtype=int)
+        rows, cols = self.to_coo()
+        adjacency_matrix[rows, cols] = 1
+        return adjacency_matrix
+
+    @classmethod
+    def from_coo(cls, rows, cols, nodes) -> 'SparseAdjacency':
+        """Строит CSR из пар (rows, cols); повторяющиеся пары схлопываются в одну."""
+        size = len(nodes)
+        keys = np.unique(np.asarray(rows, dtype=np.int64) * size + np.asarray(cols, dtype=np.int64))
+        indices = keys % size if size else keys
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        if size:
+            np.cumsum(np.bincount(keys // size, minlength=size), out=indptr[1:])
+        return cls(indptr, indices, list(nodes))
+
+    @classmethod
+    def from_dense(cls, adjacency_matrix, nodes) -> 'SparseAdjacency':
+        rows, cols = np.nonzero(adjacency_matrix)
+        return cls.from_coo(rows, cols, nodes)
+
+
+def _factorize_edges(edges: pd.DataFrame) -> CompactGraph:
+    """
+    Переводит столбцы 'from'/'to' в целочисленные коды за один проход и возвращает
+    common.graph.CompactGraph.
+
+    Коды назначаются по отсортированному списку узлов, поэтому порядок строк и
+    столбцов совпадает с sorted(set(from) | set(to)). Строка с пропущенным узлом
+    (например, "3,") — ошибка ValueError.
+    """
+    m = len(edges)
+    codes, uniques = pd.factorize(pd.concat([edges['from'], edges['to']], ignore_index=True), sort=True)
+    if (codes < 0).any():
+        row = int(np.flatnonzero(codes < 0)[0]) % m
+        raise ValueError(f"Edge in row {row + 1} has a missing node: {edges.iloc[row].tolist()}")
+    return CompactGraph(codes[:m], codes[m:], list(uniques))
+
+
+def _coerce_labels(labels: List[str]) -> List:
+    """
+    Приводит метки к числам, как pd.read_csv приводит столбцы: все целые — к int,
+    иначе все числа — к float, иначе метки остаются строками. Тип выбирается сразу
+    для всех меток, а не для каждого столбца отдельно.
+    """
+    for cast in (int, float):
+        try:
+            return [cast(label) for label in labels]
+        except ValueError:
+            continue
+    return labels
+
+
+def _stream_edges(edges_csv, chunk_size: int, cache: Optional[ContentCache] = None,
+                  digest: Optional[str] = None) -> CompactGraph:
+    """
+    То же, что _factorize_edges, но файл читается блоками по chunk_size строк.
+
+    Метки приводятся к числам (_coerce_labels) и после этого объединяются:
+    "1" и "01" — один узел 1, как при чтении через pd.read_csv. Узлы сортируются
+    по приведенным значениям.
+    """
+    graph = load_graph(edges_csv, chunk_size, cache, digest)
+    keys = _coerce_labels(graph.labels)
+    nodes = sorted(set(keys))
+    position = {key: i for i, key in enumerate(nodes)}
+    rank = np.array([position[key] for key in keys], dtype=np.int64).reshape(-1)
+    return CompactGraph(rank[graph.src], rank[graph.dst], nodes)
+
+
+def _read_edges(edges_csv, chunk_size=None) -> CompactGraph:
+    if chunk_size is None:
+        edges = pd.read_csv(edges_csv, header=None, names=['from', 'to'])
+        return _factorize_edges(edges)
+    return _stream_edges(edges_csv, chunk_size)
+
+
+def edges_to_adjacency_matrix(edges_csv, sparse=False, chunk_size=None, cache=None, memmap_dir=None):
+    """
+    Строит симметричную матрицу смежности по CSV со списком ребер.
+
+    При sparse=True вместо плотной матрицы n x n возвращает SparseAdjacency —
+    память растет с числом ребер, а не с квадратом числа узлов.
+    При заданном chunk_size файл читается потоково (common.edges), без загрузки
+    всего текста в DataFrame.
+    cache — common.cache.ContentCache: для пути к файлу разобранные ребра берутся
+    из кэша по хэшу содержимого, повторный вызов не читает CSV заново.
+    memmap_dir — каталог, куда матрица пишется файлом A.npy (dtype int8) блоками строк
+    без плотной матрицы в памяти (common.dense), рядом — index.json с порядком узлов;
+    тогда возвращается матрица, отображенная с диска только для чтения.
+    """
+    if cache is not None and isinstance(edges_csv, (str, os.PathLike)):
+        digest = file_digest(edges_csv)
+        if chunk_size is None:
+            graph = cache.get_or_compute(content_key('task0.graph', digest), lambda: _read_edges(edges_csv))
+        else:
+            graph = _stream_edges(edges_csv, chunk_size, cache, digest)
+    else:
+        graph = _read_edges(edges_csv, chunk_size)
+    # Оба способа чтения дают CompactGraph с узлами в порядке строк и столбцов матрицы
+    nodes, from_idx, to_idx = graph.labels, graph.src, graph.dst
+
+    if sparse or memmap_dir is not None:
+        adjacency = SparseAdjacency.from_coo(np.concatenate([from_idx, to_idx]),
+                                             np.concatenate([to_idx, from_idx]),
+                                             nodes)
+        if sparse:
+            return adjacency
+        os.makedirs(memmap_dir, exist_ok=True)
+        path = os.path.join(memmap_dir, 'A.npy')
+        adjacency_matrix = write_dense(path, len(nodes), adjacency.neighbors)
+        write_index(memmap_dir, nodes, {'A': path})
+        return adjacency_matrix
 
     size = len(nodes)
     adjacency_matrix = np.zeros((size, size), dtype=int)
-
-    for _, row in edges.iterrows():
-        from_idx = node_index[row['from']]
-        to_idx = node_index[row['to']]
-        adjacency_matrix[from_idx, to_idx] = 1
-        adjacency_matrix[to_idx, from_idx] = 1
+    adjacency_matrix[from_idx, to_idx] = 1
+    adjacency_matrix[to_idx, from_idx] = 1
 
     return adjacency_matrix
 
-def main(): 
+def main():
     csv_path = 'task0/task2.csv'
     adjacency_matrix = edges_to_adjacency_matrix(csv_path)
     print("Матрица смежности:")
     print(adjacency_matrix)
 
-main()
\ No newline at end of file
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Тесты для модуля task0
+"""
+import functools
+import json
+import os
+
+import pytest
+import numpy as np
+from common import dense
+from common.cache import ContentCache
+from task0 import task0
+from task0.task0 import SparseAdjacency, edges_to_adjacency_matrix
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(text, name='edges.csv'):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+
+class TestSparseAdjacency:
+    """Тесты разреженной матрицы смежности"""
+
+    def test_from_coo_deduplicates(self):
+        """Повторяющиеся пары схлопываются, столбцы в строке отсортированы"""
+        adjacency = SparseAdjacency.from_coo([0, 0, 1, 0, 2], [2, 1, 0, 2, 2], ['a', 'b', 'c'])
+
+        assert adjacency.shape == (3, 3)
+        assert adjacency.nnz == 4
+        assert adjacency.neighbors(0).tolist() == [1, 2]
+        assert adjacency.neighbors(1).tolist() == [0]
+        assert adjacency.neighbors(2).tolist() == [2]
+
+    def test_coo_round_trip(self):
+        """to_coo и from_coo — обратные преобразования"""
+        adjacency = SparseAdjacency.from_coo([2, 0, 1, 1], [0, 1, 2, 1], [1, 2, 3])
+        rows, cols = adjacency.to_coo()
+        again = SparseAdjacency.from_coo(rows, cols, adjacency.nodes)
+
+        np.testing.assert_array_equal(again.indptr, adjacency.indptr)
+        np.testing.assert_array_equal(again.indices, adjacency.indices)
+
+    def test_dense_round_trip(self):
+        """from_dense и to_dense сохраняют матрицу, включая петли"""
+        dense = np.array([[1, 1, 0, 0],
+                          [1, 0, 0, 1],
+                          [0, 0, 0, 0],
+                          [0, 1, 0, 1]])
+        adjacency = SparseAdjacency.from_dense(dense, list('abcd'))
+
+        np.testing.assert_array_equal(adjacency.to_dense(), dense)
+        assert adjacency.neighbors(2).tolist() == []
+
+    def test_empty_graph(self):
+        """Граф без узлов"""
+        adjacency = SparseAdjacency.from_coo([], [], [])
+
+        assert adjacency.shape == (0, 0)
+        assert adjacency.nnz == 0
+        assert adjacency.to_dense().shape == (0, 0)
+        assert adjacency.indptr.tolist() == [0]
+
+
+class TestEdgesToAdjacencyMatrix:
+    """Тесты построения матрицы смежности по CSV"""
+
+    def test_symmetric_matrix(self, write_csv):
+        """Матрица симметрична, узлы упорядочены"""
+        path = write_csv("1,2\n1,3\n3,4")
+        matrix = edges_to_adjacency_matrix(path)
+
+        expected = np.array([[0, 1, 1, 0],
+                             [1, 0, 0, 0],
+                             [1, 0, 0, 1],
+                             [0, 0, 1, 0]])
+        np.testing.assert_array_equal(matrix, expected)
+
+    def test_sparse_matches_dense(self, write_csv):
+        """sparse=True совпадает с плотной матрицей, дубликаты и петли учтены"""
+        path = write_csv("1,2\n2,1\n1,2\n3,3\n2,4")
+        sparse = edges_to_adjacency_matrix(path, sparse=True)
+
+        np.testing.assert_array_equal(sparse.to_dense(), edges_to_adjacency_matrix(path))
+        assert sparse.nodes == [1, 2, 3, 4]
+        assert sparse.neighbors(2).tolist() == [2]
+
+    @pytest.mark.parametrize("sparse", [False, True])
+    def test_missing_node_rejected(self, write_csv, sparse):
+        """Строка с пропущенным узлом — ValueError, а не единица в чужой клетке"""
+        path = write_csv("1,2\n3,\n2,3")
+
+        with pytest.raises(ValueError, match="row 2"):
+            edges_to_adjacency_matrix(path, sparse=sparse)
+
+
+
+class TestStreaming:
+    """Потоковое чтение (chunk_size) совпадает с чтением через pandas"""
+
+    @pytest.mark.parametrize("text", [
+        "1,2\n1,3\n3,4\n2,5",
+        "1,2\n01,3",
+        "1.5,2\n2,10",
+        "b,a\na,c\nc,b",
+        "10,9\n9,100\n100,2",
+    ])
+    def test_matches_default_path(self, write_csv, text):
+        path = write_csv(text)
+        default = edges_to_adjacency_matrix(path, sparse=True)
+        streamed = edges_to_adjacency_matrix(path, sparse=True, chunk_size=1)
+
+        assert streamed.nodes == default.nodes
+        np.testing.assert_array_equal(streamed.to_dense(), default.to_dense())
+        np.testing.assert_array_equal(edges_to_adjacency_matrix(path, chunk_size=4),
+                                      edges_to_adjacency_matrix(path))
+
+
+class TestDense:
+    """Запись плотной матрицы блоками строк (common.dense)"""
+
+    @pytest.mark.parametrize("block_bytes", [1, 7, 16, 1 << 20])
+    def test_write_dense_matches_rows(self, tmp_path, block_bytes):
+        """Любой размер блока, в том числе блок меньше строки и несколько строк на блок"""
+        rng = np.random.default_rng(block_bytes)
+        expected = (rng.random((13, 13)) < 0.3).astype(np.int8)
+        expected[4] = 0
+        path = str(tmp_path / 'M.npy')
+        matrix = dense.write_dense(path, 13, lambda i: np.flatnonzero(expected[i]), block_bytes=block_bytes)
+
+        assert matrix.dtype == np.int8
+        assert not matrix.flags.writeable
+        np.testing.assert_array_equal(matrix, expected)
+        np.testing.assert_array_equal(np.load(path), expected)
+
+    def test_write_dense_empty(self, tmp_path):
+        matrix = dense.write_dense(str(tmp_path / 'M.npy'), 0, lambda i: [])
+
+        assert matrix.shape == (0, 0)
+
+    def test_write_index(self, tmp_path):
+        """Метки numpy приводятся к типам Python, файлы — по имени без каталога"""
+        path = dense.write_index(str(tmp_path), [np.int64(3), np.int64(10)],
+                                 {'A': str(tmp_path / 'A.npy'), 'B': str(tmp_path / 'A.npy')})
+
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+        assert index == {'nodes': [3, 10], 'shape': [2, 2], 'dtype': 'int8',
+                         'files': {'A': 'A.npy', 'B': 'A.npy'}}
+
+
+class TestMemmap:
+    """memmap_dir совпадает с матрицей в памяти"""
+
+    @pytest.mark.parametrize("chunk_size", [None, 2])
+    def test_matches_in_memory(self, write_csv, tmp_path, monkeypatch, chunk_size):
+        # Маленький блок: матрица пишется за несколько отображений файла
+        monkeypatch.setattr(task0, 'write_dense', functools.partial(dense.write_dense, block_bytes=8))
+        path = write_csv("1,2\n2,1\n3,3\n2,4\n10,4\n5,6\n6,7\n7,1")
+        directory = tmp_path / 'out'
+        matrix = edges_to_adjacency_matrix(path, chunk_size=chunk_size, memmap_dir=str(directory))
+
+        np.testing.assert_array_equal(matrix, edges_to_adjacency_matrix(path))
+        np.testing.assert_array_equal(np.load(directory / 'A.npy'), matrix)
+        with open(directory / 'index.json', encoding='utf-8') as f:
+            index = json.load(f)
+        assert index['nodes'] == edges_to_adjacency_matrix(path, sparse=True).nodes
+        assert index['files'] == {'A': 'A.npy'}
+
+
+class TestCache:
+    """Кэш по содержимому файла и вытеснение записей с диска"""
+
+    @pytest.mark.parametrize("chunk_size", [None, 2])
+    def test_hit_and_invalidation(self, write_csv, chunk_size):
+        """Повторный вызов — попадание; после перезаписи файла граф читается заново"""
+        path = write_csv("1,2\n1,3\n3,4")
+        cache = ContentCache()
+        expected = edges_to_adjacency_matrix(path)
+
+        np.testing.assert_array_equal(edges_to_adjacency_matrix(path, chunk_size=chunk_size, cache=cache), expected)
+        np.testing.assert_array_equal(edges_to_adjacency_matrix(path, chunk_size=chunk_size, cache=cache), expected)
+        assert cache.hits == 1
+
+        write_csv("1,2\n1,3\n3,4\n4,5")
+        matrix = edges_to_adjacency_matrix(path, chunk_size=chunk_size, cache=cache)
+        assert matrix.shape == (5, 5)
+        np.testing.assert_array_equal(matrix, edges_to_adjacency_matrix(path))
+        assert cache.hits == 1
+
+    def test_disk_eviction(self, tmp_path):
+        """На диске остаются max_disk_entries последних по времени изменения записей"""
+        directory = tmp_path / 'cache'
+        cache = ContentCache(directory=str(directory), max_disk_entries=2)
+        for i, key in enumerate(['a', 'b']):
+            cache.put(key, i)
+            # Явные времена изменения: порядок не зависит от точности часов
+            os.utime(directory / f'{key}.pkl', (1000 + i, 1000 + i))
+        cache.put('c', 2)
+
+        assert sorted(os.listdir(directory)) == ['b.pkl', 'c.pkl']
+        fresh = ContentCache(directory=str(directory), max_disk_entries=2)
+        assert fresh.get('a') is None
+        assert (fresh.get('b'), fresh.get('c')) == (1, 2)
+
+    def test_disk_read_refreshes_entry(self, tmp_path):
+        """Чтение с диска обновляет время изменения: прочитанная запись не вытесняется"""
+        directory = tmp_path / 'cache'
+        ContentCache(directory=str(directory)).put('a', 0)
+        ContentCache(directory=str(directory)).put('b', 1)
+        os.utime(directory / 'a.pkl', (1000, 1000))
+        os.utime(directory / 'b.pkl', (2000, 2000))
+
+        cache = ContentCache(directory=str(directory), max_disk_entries=2)
+        assert cache.get('a') == 0
+        cache.put('c', 2)
+
+        assert sorted(os.listdir(directory)) == ['a.pkl', 'c.pkl']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
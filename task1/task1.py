@@ -1,8 +1,17 @@
 import csv
-from collections import defaultdict, deque
-from typing import List, Tuple, Dict
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple, Union
 import numpy as np
 
+from common.cache import ContentCache, content_key, file_digest
+from common.dense import write_dense, write_index
+from common.entropy import reference_entropy
+from common.edges import DEFAULT_CHUNK_SIZE
+from common.graph import CompactGraph, CompactTree, load_graph
+from common.reroot import RerootedTree
+
 '''
 Задание 1. Для лабораторной работы по системному анализу: 
 
@@ -15,6 +24,251 @@ import numpy as np
 
 
 
+class BitMatrix:
+    """
+    Булева матрица, упакованная по битам: каждая строка хранится через np.packbits,
+    т.е. 8 клеток в байте вместо 8 байт на клетку у dtype=int.
+
+    Транспонирование (свойство T) не копирует данные — возвращает представление
+    над тем же буфером, в котором строки и столбцы меняются ролями.
+    """
+
+    def __init__(self, bits: np.ndarray, shape: Tuple[int, int], transposed: bool = False):
+        self.bits = bits
+        self.shape = shape
+        self.transposed = transposed
+
+    @property
+    def T(self) -> 'BitMatrix':
+        return BitMatrix(self.bits, (self.shape[1], self.shape[0]), not self.transposed)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def _stored_row(self, i: int) -> np.ndarray:
+        n_cols = self.shape[0] if self.transposed else self.shape[1]
+        return np.unpackbits(self.bits[i], count=n_cols).astype(bool)
+
+    def _stored_col(self, j: int) -> np.ndarray:
+        return ((self.bits[:, j >> 3] >> (7 - (j & 7))) & 1).astype(bool)
+
+    def row(self, i: int) -> np.ndarray:
+        """Строка i в виде булева массива."""
+        return self._stored_col(i) if self.transposed else self._stored_row(i)
+
+    def col(self, j: int) -> np.ndarray:
+        """Столбец j в виде булева массива."""
+        return self._stored_row(j) if self.transposed else self._stored_col(j)
+
+    def __getitem__(self, cell: Tuple[int, int]) -> int:
+        i, j = cell
+        # Столбцы за n в последнем байте строки — выравнивание, а не клетки матрицы
+        if not (0 <= i < self.shape[0] and 0 <= j < self.shape[1]):
+            raise IndexError(f"Cell {cell} is out of bounds for shape {self.shape}")
+        if self.transposed:
+            i, j = j, i
+        return int((self.bits[i, j >> 3] >> (7 - (j & 7))) & 1)
+
+    def to_dense(self) -> np.ndarray:
+        """Плотная матрица dtype=int, как в build_matrices без упаковки."""
+        n_cols = self.shape[0] if self.transposed else self.shape[1]
+        dense = np.unpackbits(self.bits, axis=1, count=n_cols).astype(int)
+        return dense.T if self.transposed else dense
+
+    @classmethod
+    def from_rows(cls, n: int, rows) -> 'BitMatrix':
+        """
+        Упаковывает квадратную матрицу n x n построчно: rows[i] — номера единичных
+        столбцов строки i. Плотная матрица целиком не создается.
+        """
+        bits = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+        buffer = np.zeros(n, dtype=bool)
+        for i, columns in enumerate(rows):
+            if len(columns) == 0:
+                continue
+            buffer[columns] = True
+            bits[i] = np.packbits(buffer)
+            buffer[columns] = False
+        bits.setflags(write=False)
+        return cls(bits, (n, n))
+
+
+class TreeIndex:
+    """
+    Индекс ориентированного дерева на основе эйлерова обхода (DFS в прямом порядке)
+    поверх common.graph.CompactTree.
+
+    Для узла с номером i (номер — позиция в списке nodes) хранятся tin[i] — время входа
+    и tout[i] = tin[i] + размер поддерева. Тогда j — потомок i тогда и только тогда,
+    когда tin[i] < tin[j] < tout[i], а все потомки i — это непрерывный отрезок
+    order[tin[i] + 1:tout[i]]. Строится за O(n), запрос «потомок ли» — O(1).
+    Родитель, глубина и дети берутся из самого CompactTree.
+    """
+
+    def __init__(self, tree: CompactTree):
+        n = len(tree)
+        self.tree = tree
+        self.nodes = tree.labels
+        self.idx = {node: i for i, node in enumerate(self.nodes)}
+        offsets = tree.child_offsets.tolist()
+        children = tree.child_index.tolist()
+
+        # Итеративный DFS в прямом порядке из каждого корня (узлы без родителя)
+        order: List[int] = []
+        for start in np.flatnonzero(tree.parent < 0).tolist():
+            stack = [start]
+            while stack:
+                node = stack.pop()
+                order.append(node)
+                stack.extend(reversed(children[offsets[node]:offsets[node + 1]]))
+
+        self.order = np.array(order, dtype=np.int64).reshape(-1)
+        self.tin = np.empty(n, dtype=np.int64)
+        self.tin[self.order] = np.arange(n)
+        self.tout = self.tin + tree.size
+        self.parent = tree.parent
+        self.depth = tree.depth
+        self.n_children = tree.n_children
+
+    @classmethod
+    def from_dict(cls, tree: Dict[str, List[str]], nodes: List[str]) -> 'TreeIndex':
+        """Индекс по словарю parent -> children (как из build_tree); номера — позиции в nodes."""
+        return cls(_compact_from_dict(tree, nodes))
+
+    def children(self, i: int) -> np.ndarray:
+        """Номера детей узла i."""
+        return self.tree.children(i)
+
+    def is_descendant(self, i: int, j: int) -> bool:
+        """True, если узел j — потомок узла i (на расстоянии > 0)."""
+        return bool(self.tin[i] < self.tin[j] < self.tout[i])
+
+    def descendants(self, i: int) -> np.ndarray:
+        """Номера всех потомков узла i (срез эйлерова обхода, без копирования)."""
+        return self.order[self.tin[i] + 1:self.tout[i]]
+
+    def descendant_count(self, i: int) -> int:
+        return int(self.tout[i] - self.tin[i] - 1)
+
+
+# Дерево для build_matrices, TreeRelations и export_relations: словарь parent -> children
+# с отдельным списком nodes или CompactTree, пронумерованный в порядке nodes
+TreeLike = Union[Dict[str, List[str]], CompactTree]
+
+
+def _compact_from_dict(tree: Dict[str, List[str]], nodes: List[str]) -> CompactTree:
+    idx = {node: i for i, node in enumerate(nodes)}
+    parent = [-1] * len(nodes)
+    child_order = []
+    for node, children in tree.items():
+        for child in children:
+            parent[idx[child]] = idx[node]
+            child_order.append(idx[child])
+    return CompactTree(list(nodes), parent, child_order)
+
+
+def _tree_index(tree: TreeLike, nodes: List[str]) -> TreeIndex:
+    if isinstance(tree, CompactTree):
+        return TreeIndex(tree)
+    return TreeIndex.from_dict(tree, nodes)
+
+
+class TreeRelations:
+    """
+    Ленивые отношения r1-r5 поверх дерева из build_tree или load_compact_tree: отвечает
+    на запросы принадлежности, перечисления соседей и подсчета без построения матриц n x n.
+
+    Все запросы принимают метки узлов. Стоимость has() и count() — O(1),
+    neighbors() — пропорциональна размеру ответа. Плотная матрица строится
+    только по запросу matrix() и кэшируется.
+    """
+
+    RELATIONS = ('r1', 'r2', 'r3', 'r4', 'r5')
+
+    def __init__(self, tree: TreeLike, nodes: List[str]):
+        self.index = _tree_index(tree, nodes)
+        self.nodes = nodes
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    def _check(self, relation: str) -> None:
+        if relation not in self.RELATIONS:
+            raise ValueError(f"Unknown relation '{relation}', expected one of {self.RELATIONS}")
+
+    def row(self, relation: str, i: int):
+        """
+        Номера единичных столбцов строки i матрицы relation (i — позиция в nodes).
+        То же, что neighbors(), но в номерах узлов, для построчной записи матриц.
+        """
+        self._check(relation)
+        index = self.index
+        parent = int(index.parent[i])
+        if relation == 'r1':
+            return index.children(i)
+        if relation == 'r2':
+            return [parent] if parent >= 0 else []
+        if relation == 'r3':
+            return index.descendants(i)
+        if relation == 'r4':
+            ancestors = []
+            while parent >= 0:
+                ancestors.append(parent)
+                parent = int(index.parent[parent])
+            return ancestors
+        if parent < 0:
+            return []
+        siblings = index.children(parent)
+        return siblings[siblings != i]
+
+    def has(self, relation: str, u: str, v: str) -> bool:
+        """True, если пара (u, v) входит в отношение relation."""
+        self._check(relation)
+        index = self.index
+        i, j = index.idx[u], index.idx[v]
+        if relation == 'r1':
+            return bool(index.parent[j] == i)
+        if relation == 'r2':
+            return bool(index.parent[i] == j)
+        if relation == 'r3':
+            return index.is_descendant(i, j)
+        if relation == 'r4':
+            return index.is_descendant(j, i)
+        return bool(i != j and index.parent[i] >= 0 and index.parent[i] == index.parent[j])
+
+    def neighbors(self, relation: str, u: str) -> Iterator[str]:
+        """Перебирает все v, для которых пара (u, v) входит в отношение relation."""
+        self._check(relation)
+        for j in self.row(relation, self.index.idx[u]):
+            yield self.nodes[j]
+
+    def count(self, relation: str, u: str) -> int:
+        """Число v, для которых (u, v) входит в relation (полустепень исхода в матрице)."""
+        self._check(relation)
+        index = self.index
+        i = index.idx[u]
+        parent = index.parent[i]
+        if relation == 'r1':
+            return int(index.n_children[i])
+        if relation == 'r2':
+            return int(parent >= 0)
+        if relation == 'r3':
+            return index.descendant_count(i)
+        if relation == 'r4':
+            return int(index.depth[i])
+        return int(index.n_children[parent]) - 1 if parent >= 0 else 0
+
+    def matrix(self, relation: str) -> np.ndarray:
+        """Плотная матрица отношения (как в build_matrices), строится один раз."""
+        self._check(relation)
+        if relation not in self._matrices:
+            n = len(self.nodes)
+            m = np.zeros((n, n), dtype=int)
+            for i in range(n):
+                m[i, self.row(relation, i)] = 1
+            self._matrices[relation] = m
+        return self._matrices[relation]
+
+
 def read_edges_from_csv(filename: str) -> List[Tuple[str, str]]:
     """
     Читает ребра из CSV-файла. Каждая строка должна содержать минимум два значения
@@ -46,38 +300,36 @@ def build_tree(edges: List[Tuple[str, str]], root: str) -> Tuple[Dict[str, List[
       - tree: словарь parent -> список children
       - nodes: упорядоченный список всех узлов (root первым, остальные — в отсортированном порядке)
     """
-    # Сначала строим неориентированный список смежности
-    undirected = defaultdict(list)
-    all_nodes = set()
-    for u, v in edges:
-        undirected[u].append(v)
-        undirected[v].append(u)
-        all_nodes.update([u, v])
-
-    if root not in all_nodes:
-        raise ValueError(f"Root '{root}' not found among nodes: {sorted(all_nodes)}")
-
-    # Обход в ширину (BFS) для ориентации ребер от корня (parent -> children)
-    tree: Dict[str, List[str]] = defaultdict(list)
-    visited = {root}
-    q = deque([root])
-    while q:
-        parent = q.popleft()
-        for neighbor in undirected[parent]:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                tree[parent].append(neighbor)
-                q.append(neighbor)
-    # Обеспечиваем стабильный порядок узлов: сначала root, затем остальные в отсортированном порядке
-    others = sorted(n for n in all_nodes if n != root)
-    nodes = [root] + others
-    return tree, nodes
-
-
-def build_matrices(tree: Dict[str, List[str]], nodes: List[str]) -> Tuple[np.ndarray, ...]:
-    """
-    По заданному ориентированному дереву (parent -> children) и упорядоченному списку узлов
-    строит 6 матриц и возвращает их кортежом:
+    return _orient_graph(CompactGraph.from_pairs(edges), root)
+
+
+def _orient_compact(graph: CompactGraph, root: str) -> CompactTree:
+    """
+    Ориентирует граф от root обходом в ширину (CompactGraph.orient) и перенумеровывает
+    узлы в порядке nodes: сначала root, затем остальные в отсортированном порядке.
+    """
+    try:
+        start = graph.index(root)
+    except KeyError:
+        raise ValueError(f"Root '{root}' not found among nodes: {sorted(graph.labels)}") from None
+    labels = graph.labels
+    others = sorted((i for i in range(len(labels)) if i != start), key=labels.__getitem__)
+    return graph.orient(start).permuted([start] + others)
+
+
+def _orient_graph(graph: CompactGraph, root: str) -> Tuple[Dict[str, List[str]], List[str]]:
+    """То же, что _orient_compact, но в виде словаря parent -> children и списка nodes."""
+    compact = _orient_compact(graph, root)
+    tree: Dict[str, List[str]] = defaultdict(list, compact.to_dict())
+    return tree, compact.labels
+
+
+def build_matrices(tree: TreeLike, nodes: List[str],
+                   packed: bool = False, memmap_dir: str = None) -> Tuple[np.ndarray, ...]:
+    """
+    По заданному ориентированному дереву (parent -> children или CompactTree из
+    load_compact_tree) и упорядоченному списку узлов строит 6 матриц и возвращает
+    их кортежом:
 
     (A, r1, r2, r3, r4, r5)
 
@@ -88,15 +340,27 @@ def build_matrices(tree: Dict[str, List[str]], nodes: List[str]) -> Tuple[np.nda
       - r3: опосредованное управление: r3[i,j] = 1 если j — потомок i (на любом расстоянии >0)
       - r4: транспонированная r3 (опосредованное подчинение)
       - r5: соподчинение: r5[i,j] = 1 если i и j имеют общего родителя (братья/сестры), симметрична
+
+    При packed=True возвращает BitMatrix вместо np.ndarray: A и r1 делят один буфер,
+    r2 и r4 — транспонированные представления r1 и r3 без копирования.
+    При заданном memmap_dir матрицы пишутся в этот каталог файлами r1.npy, ..., r5.npy
+    (dtype int8) блоками строк, без матриц n x n в памяти (common.dense), рядом —
+    index.json с порядком узлов, где A ссылается на r1.npy; возвращаются матрицы,
+    отображенные с диска только для чтения (A и r1 — один и тот же массив).
     """
+    if packed:
+        return _build_packed_matrices(tree, nodes)
+    if memmap_dir is not None:
+        return _write_memmap_matrices(tree, nodes, memmap_dir)
+
     n = len(nodes)
-    idx = {node: i for i, node in enumerate(nodes)}
+    tree_index = _tree_index(tree, nodes)
+    parent = tree_index.parent
+    has_parent = parent >= 0
 
     # 1) Построить матрицу смежности A (parent -> child)
     A = np.zeros((n, n), dtype=int)
-    for parent, children in tree.items():
-        for child in children:
-            A[idx[parent], idx[child]] = 1
+    A[parent[has_parent], np.flatnonzero(has_parent)] = 1
 
     # 2) r1 — матрица управления (прямое управление)
     r1 = A.copy()
@@ -104,48 +368,214 @@ def build_matrices(tree: Dict[str, List[str]], nodes: List[str]) -> Tuple[np.nda
     # 3) r2 — транспонированная r1 (прямое подчинение)
     r2 = r1.T.copy()
 
-    # 4) r3: опосредованное управление — достижимость (i -> j по направленным ребрам)
+    # 4) r3: опосредованное управление — достижимость (i -> j по направленным ребрам).
+    # Потомки узла — непрерывный отрезок эйлерова обхода, поэтому строка заполняется
+    # одним присваиванием, без отдельного обхода из каждого узла
     r3 = np.zeros((n, n), dtype=int)
-    # Для каждого узла выполняем DFS/BFS, чтобы пометить всех потомков
-    for node in nodes:
-        start = node
-        if start not in tree and all(start not in children for children in tree.values()):
-            # лист без детей -> потомков нет
-            continue
-        stack = list(tree.get(start, []))
-        while stack:
-            child = stack.pop()
-            r3[idx[start], idx[child]] = 1
-            # добавляем детей текущего ребенка (внуки и далее)
-            stack.extend(tree.get(child, []))
+    for i in range(n):
+        r3[i, tree_index.descendants(i)] = 1
 
     # 5) r4 — транспонированная r3 (опосредованное подчинение)
     r4 = r3.T.copy()
 
-    # 6) r5: соподчинение (братья/сестры) — симметричная матрица
+    # 6) r5: соподчинение (братья/сестры) — симметричная матрица, блок на каждого родителя
     r5 = np.zeros((n, n), dtype=int)
-    for parent, children in tree.items():
-        for i in range(len(children)):
-            for j in range(i + 1, len(children)):
-                a = idx[children[i]]
-                b = idx[children[j]]
-                r5[a, b] = 1
-                r5[b, a] = 1
+    for i in np.flatnonzero(tree_index.n_children > 1).tolist():
+        children = tree_index.children(i)
+        r5[np.ix_(children, children)] = 1
+    np.fill_diagonal(r5, 0)
+
+    return A, r1, r2, r3, r4, r5
 
+
+def _build_packed_matrices(tree: TreeLike, nodes: List[str]) -> Tuple[BitMatrix, ...]:
+    """Упакованный вариант build_matrices: матрицы заполняются построчно, без n x n массивов."""
+    n = len(nodes)
+    relations = TreeRelations(tree, nodes)
+
+    def rows(relation: str):
+        return (relations.row(relation, i) for i in range(n))
+
+    A = BitMatrix.from_rows(n, rows('r1'))
+    r1 = A
+    r2 = r1.T
+    r3 = BitMatrix.from_rows(n, rows('r3'))
+    r4 = r3.T
+    r5 = BitMatrix.from_rows(n, rows('r5'))
     return A, r1, r2, r3, r4, r5
 
 
-def main(filename: str, root: str) -> Tuple[np.ndarray, ...]:
-    """Верхнеуровневая функция: читает ребра из CSV, строит дерево от root, возвращает 6 матриц."""
-    edges = read_edges_from_csv(filename)
-    tree, nodes = build_tree(edges, root)
-    matrices = build_matrices(tree, nodes)
+def _write_memmap_matrices(tree: TreeLike, nodes: List[str], directory: str) -> Tuple[np.ndarray, ...]:
+    """
+    Вариант build_matrices с записью на диск: строки берутся из TreeRelations по одной.
+    A совпадает с r1 и отдельным файлом не пишется: в index.json A ссылается на r1.npy.
+    """
+    os.makedirs(directory, exist_ok=True)
+    relations = TreeRelations(tree, nodes)
+    files = {}
+    matrices = {}
+    for relation in TreeRelations.RELATIONS:
+        files[relation] = os.path.join(directory, f'{relation}.npy')
+        matrices[relation] = write_dense(files[relation], len(nodes),
+                                         lambda i, relation=relation: relations.row(relation, i))
+    write_index(directory, nodes, {'A': files['r1'], **files})
+    return (matrices['r1'],) + tuple(matrices[relation] for relation in TreeRelations.RELATIONS)
+
+
+def _relation_rows(relations: 'TreeRelations', relation: str) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Строки отношения: пары (i, номера j) в произвольном порядке строк.
+    Предки (r4) берутся из текущего пути DFS, а не подъемом по родителям от каждого узла.
+    """
+    index = relations.index
+    if relation != 'r4':
+        for i in range(len(relations.nodes)):
+            yield i, np.asarray(relations.row(relation, i), dtype=np.int64)
+        return
+    path = np.empty(len(relations.nodes), dtype=np.int64)
+    for node, depth in zip(index.order.tolist(), index.depth[index.order].tolist()):
+        path[depth] = node
+        yield node, path[:depth]
+
+
+def export_relations(tree: TreeLike, nodes: List[str], directory: str) -> Dict[str, str]:
+    """
+    Записывает r1-r5 в каталог directory без построения матриц: для каждого отношения
+    файл <r>.npy с массивом int32 формы (k, 2) — номера (i, j) единичных клеток
+    в порядке обхода матрицы по строкам, как np.argwhere(r). Номера — позиции в nodes;
+    сам список узлов и число пар каждого отношения сохраняются в nodes.json.
+    Матрица A совпадает с r1 и отдельно не пишется.
+
+    Размер файла известен заранее (TreeRelations.count по всем узлам), поэтому он
+    создается через np.lib.format.open_memmap и заполняется строка за строкой:
+    память — O(n) плюс самая длинная строка. Возвращает пути к записанным файлам.
+    """
+    os.makedirs(directory, exist_ok=True)
+    relations = TreeRelations(tree, nodes)
+    index = relations.index
+    n = len(nodes)
+    has_parent = index.parent >= 0
+    siblings = np.zeros(n, dtype=np.int64)
+    siblings[has_parent] = index.n_children[index.parent[has_parent]] - 1
+    counts = {
+        'r1': index.n_children.astype(np.int64),
+        'r2': has_parent.astype(np.int64),
+        'r3': index.tout - index.tin - 1,
+        'r4': index.depth,
+        'r5': siblings,
+    }
+
+    paths = {}
+    for relation in TreeRelations.RELATIONS:
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts[relation], out=offsets[1:])
+        path = os.path.join(directory, f'{relation}.npy')
+        pairs = np.lib.format.open_memmap(path, mode='w+', dtype=np.int32, shape=(int(offsets[-1]), 2))
+        for i, row in _relation_rows(relations, relation):
+            lo, hi = offsets[i], offsets[i + 1]
+            if lo == hi:
+                continue
+            pairs[lo:hi, 0] = i
+            pairs[lo:hi, 1] = np.sort(row)
+        pairs.flush()
+        del pairs
+        paths[relation] = path
+
+    paths['nodes'] = os.path.join(directory, 'nodes.json')
+    with open(paths['nodes'], 'w', encoding='utf-8') as f:
+        json.dump({'nodes': nodes,
+                   'counts': {relation: int(c.sum()) for relation, c in counts.items()}},
+                  f, ensure_ascii=False)
+    return paths
+
+
+def all_roots(edges: List[Tuple[str, str]]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Числа связей и энтропия для всех возможных корней одного неориентированного
+    дерева сразу — без n вызовов build_tree и build_matrices.
+
+    Возвращает (nodes, counts, entropy, normalized), строка i — для корня nodes[i]
+    (узлы отсортированы):
+      - counts: матрица (n, 5) — число единиц в r1-r5 при этом корне
+        (r1 = r2 = n - 1, r3 = r4 — сумма глубин, r5 — упорядоченные пары братьев);
+      - entropy, normalized — структурная энтропия в смысле task2.entropy,
+        посчитанная по строкам матриц r1-r5 (сколько детей, родителей, потомков,
+        предков и братьев у каждого узла).
+
+    Все, кроме предков, зависит только от числа детей и размера поддерева узла и
+    пересчитывается переносом корня за O(n); вклад предков (глубин) — через
+    centroid-декомпозицию за O(n log^2 n), см. common.reroot.
+    Если ребра не образуют дерево, бросает ValueError.
+    """
+    nodes = sorted({node for edge in edges for node in edge})
+    n = len(nodes)
+    if n == 0:
+        return nodes, np.zeros((0, 5), dtype=np.int64), np.zeros(0), np.zeros(0)
+    tree = RerootedTree(CompactGraph.from_pairs(edges, nodes))
+
+    depth_sums = tree.distance_sums()
+    counts = np.empty((n, 5), dtype=np.int64)
+    counts[:, 0] = counts[:, 1] = n - 1
+    counts[:, 2] = counts[:, 3] = depth_sums
+    # Каждый из c детей узла имеет c - 1 братьев
+    counts[:, 4] = tree.node_term_sums(lambda children, has_parent, size: children * (children - 1))
+
+    # r3 — все потомки, r4 — все предки
+    total = tree.relation_entropy(lambda children, size: size - 1, lambda depth: depth)
+    normalized = total / reference_entropy(n)
+    return nodes, counts, total, normalized
+
+
+def load_compact_tree(filename: str, root: str, chunk_size: int = None,
+                      cache: ContentCache = None) -> CompactTree:
+    """
+    Дерево от root по CSV-файлу в виде CompactTree, пронумерованного в порядке nodes
+    (как в build_tree; сами nodes — его labels). С cache — через кэш по содержимому
+    файла: разобранный граф хранится один раз на файл, дерево — на пару (файл, root),
+    и повторный вызов не читает CSV и не повторяет обход в ширину.
+    """
+    if cache is None:
+        if chunk_size is None:
+            return _orient_compact(CompactGraph.from_pairs(read_edges_from_csv(filename)), root)
+        return _orient_compact(CompactGraph.from_csv(filename, chunk_size), root)
+    digest = file_digest(filename)
+
+    def orient():
+        graph = load_graph(filename, chunk_size or DEFAULT_CHUNK_SIZE, cache, digest)
+        return _orient_compact(graph, root)
+
+    return cache.get_or_compute(content_key('task1.compact_tree', digest, root), orient)
+
+
+def main(filename: str, root: str, chunk_size: int = None, packed: bool = False,
+         lazy: bool = False, export_dir: str = None, cache: ContentCache = None,
+         memmap_dir: str = None):
+    """
+    Верхнеуровневая функция: читает ребра из CSV, строит дерево от root, возвращает 6 матриц.
+
+    При заданном chunk_size файл читается потоково блоками по chunk_size ребер
+    (common.edges), без промежуточного списка кортежей строк.
+    packed=True возвращает битовые матрицы BitMatrix (см. build_matrices).
+    lazy=True вместо матриц возвращает TreeRelations для запросов по требованию.
+    export_dir — каталог, куда r1-r5 пишутся списками пар (export_relations);
+    тогда возвращаются пути к файлам.
+    cache — common.cache.ContentCache для повторных вызовов с тем же файлом (load_compact_tree).
+    memmap_dir — каталог для плотных матриц в файлах .npy (см. build_matrices).
+    """
+    # Дерево остается в массивах CompactTree, без промежуточного словаря меток
+    tree = load_compact_tree(filename, root, chunk_size, cache)
+    nodes = tree.labels
+    if export_dir is not None:
+        return export_relations(tree, nodes, export_dir)
+    if lazy:
+        return TreeRelations(tree, nodes)
+    matrices = build_matrices(tree, nodes, packed=packed, memmap_dir=memmap_dir)
     return matrices
 
 
 if __name__ == '__main__':
     # Демо: при запуске как скрипт создаём небольшой CSV и печатаем матрицы
-    demo_csv = 'example.csv'
+    demo_csv = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'example.csv')
     demo_edges = [
         ('root', 'A'),
         ('root', 'B'),
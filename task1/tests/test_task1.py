@@ -0,0 +1,465 @@
+"""
+Тесты для модуля task1
+"""
+import functools
+import json
+import math
+import os
+import random
+
+import pytest
+import numpy as np
+from common import dense
+from common.cache import ContentCache
+from common.edges import read_edge_chunks, read_edge_arrays
+from common.graph import CompactGraph
+from common.reroot import RerootedTree
+from task1 import task1
+from task1.task1 import (BitMatrix, TreeIndex, TreeRelations, all_roots, build_tree, build_matrices,
+                         export_relations, load_compact_tree, main, read_edges_from_csv)
+
+
+def random_tree_edges(n, seed):
+    """Случайное дерево на метках '0'..'n-1', ребра в случайном порядке и направлении"""
+    rng = random.Random(seed)
+    edges = []
+    for i in range(1, n):
+        p = rng.randrange(i)
+        edges.append((str(p), str(i)) if rng.random() < 0.5 else (str(i), str(p)))
+    rng.shuffle(edges)
+    return edges
+
+
+TREES = [
+    ([('root', 'A'), ('root', 'B'), ('A', 'A1'), ('A', 'A2'), ('B', 'B1'), ('B', 'B2')], 'root'),
+    ([(str(i), str(i + 1)) for i in range(12)], '5'),
+    ([('0', str(i)) for i in range(1, 10)], '0'),
+    (random_tree_edges(17, seed=1), '3'),
+    (random_tree_edges(8, seed=2), '0'),
+]
+
+
+def dense_matrices(edges, root):
+    tree, nodes = build_tree(edges, root)
+    return build_matrices(tree, nodes)
+
+
+class TestBitMatrix:
+    """Упакованные матрицы совпадают с плотными"""
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_to_dense(self, edges, root):
+        tree, nodes = build_tree(edges, root)
+        for packed, dense in zip(build_matrices(tree, nodes, packed=True), build_matrices(tree, nodes)):
+            assert packed.shape == dense.shape
+            np.testing.assert_array_equal(packed.to_dense(), dense)
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_rows_cols_and_cells(self, edges, root):
+        """row, col и [i, j], в том числе у транспонированных r2 и r4"""
+        tree, nodes = build_tree(edges, root)
+        n = len(nodes)
+        for packed, dense in zip(build_matrices(tree, nodes, packed=True), build_matrices(tree, nodes)):
+            for i in range(n):
+                np.testing.assert_array_equal(packed.row(i), dense[i].astype(bool))
+                np.testing.assert_array_equal(packed.col(i), dense[:, i].astype(bool))
+            cells = [[packed[i, j] for j in range(n)] for i in range(n)]
+            np.testing.assert_array_equal(cells, dense)
+
+    def test_transpose(self):
+        """T не копирует буфер и меняет строки и столбцы местами"""
+        dense = np.zeros((11, 11), dtype=int)
+        dense[0, [1, 9, 10]] = 1
+        dense[7, 3] = 1
+        matrix = BitMatrix.from_rows(11, [np.flatnonzero(row) for row in dense])
+
+        assert matrix.T.bits is matrix.bits
+        np.testing.assert_array_equal(matrix.T.to_dense(), dense.T)
+        np.testing.assert_array_equal(matrix.T.T.to_dense(), dense)
+        assert matrix.T[10, 0] == 1
+        assert matrix.T.row(3).tolist() == dense[:, 3].astype(bool).tolist()
+
+    def test_out_of_bounds(self):
+        """Клетки выравнивающих битов последнего байта недоступны"""
+        matrix = BitMatrix.from_rows(5, [[1], [], [], [], [4]])
+
+        assert matrix[4, 4] == 1
+        for cell in [(0, 5), (0, 7), (5, 0), (-1, 0)]:
+            with pytest.raises(IndexError):
+                matrix[cell]
+            with pytest.raises(IndexError):
+                matrix.T[cell]
+
+
+def dfs_descendants(tree, nodes):
+    """Прежний расчет r3: отдельный обход в глубину из каждого узла"""
+    idx = {node: i for i, node in enumerate(nodes)}
+    r3 = np.zeros((len(nodes), len(nodes)), dtype=int)
+    for node in nodes:
+        stack = list(tree.get(node, []))
+        while stack:
+            child = stack.pop()
+            r3[idx[node], idx[child]] = 1
+            stack.extend(tree.get(child, []))
+    return r3
+
+
+class TestTreeIndex:
+    """Эйлеров обход и матрицы r3/r4"""
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_r3_r4_match_dfs(self, edges, root):
+        tree, nodes = build_tree(edges, root)
+        _, _, _, r3, r4, _ = build_matrices(tree, nodes)
+        expected = dfs_descendants(tree, nodes)
+
+        np.testing.assert_array_equal(r3, expected)
+        np.testing.assert_array_equal(r4, expected.T)
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_queries_match_dfs(self, edges, root):
+        tree, nodes = build_tree(edges, root)
+        index = TreeIndex.from_dict(tree, nodes)
+        expected = dfs_descendants(tree, nodes)
+
+        for i in range(len(nodes)):
+            assert sorted(index.descendants(i).tolist()) == np.flatnonzero(expected[i]).tolist()
+            assert index.descendant_count(i) == expected[i].sum()
+            for j in range(len(nodes)):
+                assert index.is_descendant(i, j) == bool(expected[i, j])
+
+    def test_unreachable_nodes(self):
+        """Узлы, недостижимые из корня, остаются отдельными корнями без потомков"""
+        edges = [('a', 'b'), ('b', 'c'), ('x', 'y'), ('y', 'z')]
+        tree, nodes = build_tree(edges, 'a')
+        index = TreeIndex.from_dict(tree, nodes)
+        idx = index.idx
+
+        assert sorted(index.order.tolist()) == list(range(len(nodes)))
+        assert index.descendant_count(idx['a']) == 2
+        for node in 'xyz':
+            assert index.parent[idx[node]] == -1
+            assert index.descendant_count(idx[node]) == 0
+        assert not index.is_descendant(idx['x'], idx['y'])
+        np.testing.assert_array_equal(build_matrices(tree, nodes)[3], dfs_descendants(tree, nodes))
+
+    def test_forest(self):
+        """Несколько корней в самом словаре дерева"""
+        tree = {'a': ['b', 'c'], 'x': ['y'], 'y': ['z']}
+        nodes = ['a', 'b', 'c', 'x', 'y', 'z']
+        index = TreeIndex.from_dict(tree, nodes)
+
+        assert index.descendants(3).tolist() == [4, 5]
+        assert index.is_descendant(3, 5)
+        assert not index.is_descendant(0, 5)
+        assert index.depth.tolist() == [0, 1, 1, 0, 1, 2]
+
+
+
+class TestTreeRelations:
+    """Ленивые запросы совпадают с плотными матрицами"""
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_queries_match_matrices(self, edges, root):
+        tree, nodes = build_tree(edges, root)
+        relations = TreeRelations(tree, nodes)
+        matrices = dict(zip(TreeRelations.RELATIONS, build_matrices(tree, nodes)[1:]))
+
+        for relation, dense in matrices.items():
+            np.testing.assert_array_equal(relations.matrix(relation), dense)
+            for i, u in enumerate(nodes):
+                expected = np.flatnonzero(dense[i]).tolist()
+                assert sorted(relations.row(relation, i)) == expected
+                assert sorted(nodes.index(v) for v in relations.neighbors(relation, u)) == expected
+                assert relations.count(relation, u) == len(expected)
+                for j, v in enumerate(nodes):
+                    assert relations.has(relation, u, v) == bool(dense[i, j])
+
+    def test_matrix_cached(self):
+        tree, nodes = build_tree(TREES[0][0], TREES[0][1])
+        relations = TreeRelations(tree, nodes)
+
+        assert relations.matrix('r3') is relations.matrix('r3')
+
+    def test_unknown_relation(self):
+        tree, nodes = build_tree(TREES[0][0], TREES[0][1])
+        relations = TreeRelations(tree, nodes)
+
+        for query in (lambda: relations.has('r6', 'A', 'B'), lambda: relations.count('A', 'A'),
+                      lambda: list(relations.neighbors('r0', 'A')), lambda: relations.row('r7', 0),
+                      lambda: relations.matrix('r')):
+            with pytest.raises(ValueError):
+                query()
+
+
+
+class TestExportRelations:
+    """Списки пар r1-r5 на диске"""
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_pairs_match_matrices(self, tmp_path, edges, root):
+        tree, nodes = build_tree(edges, root)
+        paths = export_relations(tree, nodes, str(tmp_path))
+        matrices = dict(zip(TreeRelations.RELATIONS, build_matrices(tree, nodes)[1:]))
+
+        for relation, dense in matrices.items():
+            pairs = np.load(paths[relation])
+            assert pairs.dtype == np.int32
+            np.testing.assert_array_equal(pairs.reshape(-1, 2), np.argwhere(dense))
+
+        with open(paths['nodes'], encoding='utf-8') as f:
+            index = json.load(f)
+        assert index['nodes'] == nodes
+        assert index['counts'] == {relation: int(dense.sum()) for relation, dense in matrices.items()}
+        assert sorted(os.listdir(tmp_path)) == ['nodes.json', 'r1.npy', 'r2.npy', 'r3.npy', 'r4.npy', 'r5.npy']
+
+
+def chain_edges(n):
+    return [(str(i), str(i + 1)) for i in range(n - 1)]
+
+
+def star_edges(n):
+    return [('0', str(i)) for i in range(1, n)]
+
+
+def brute_force_root(edges, root):
+    """Числа связей r1-r5 и энтропия при одном корне — через build_tree и build_matrices"""
+    tree, nodes = build_tree(edges, root)
+    matrices = build_matrices(tree, nodes)[1:]
+    n = len(nodes)
+    total = 0.0
+    for matrix in matrices:
+        for lij in matrix.sum(axis=1).tolist():
+            if lij > 0:
+                P = lij / (n - 1)
+                total += -P * math.log2(P)
+    return [int(matrix.sum()) for matrix in matrices], total
+
+
+class TestAllRoots:
+    """all_roots совпадает с build_tree + build_matrices для каждого корня"""
+
+    @pytest.mark.parametrize("edges", [
+        random_tree_edges(2, seed=3),
+        random_tree_edges(30, seed=4),
+        random_tree_edges(60, seed=5),
+        chain_edges(25),
+        star_edges(20),
+        [('a', 'b'), ('c', 'b'), ('b', 'd'), ('d', 'e')],
+    ])
+    def test_matches_brute_force(self, edges):
+        nodes, counts, total, normalized = all_roots(edges)
+
+        assert counts.dtype == np.int64
+        for i, root in enumerate(nodes):
+            expected_counts, expected_total = brute_force_root(edges, root)
+            assert counts[i].tolist() == expected_counts
+            assert total[i] == pytest.approx(expected_total, rel=1e-9, abs=1e-9)
+        n = len(nodes)
+        np.testing.assert_allclose(normalized, total / (1 / (math.e * math.log(2)) * n * 5))
+
+    @pytest.mark.parametrize("edges", [
+        chain_edges(400),
+        # Длинный путь с листьями: корреляции через БПФ и ветви разной глубины
+        chain_edges(380) + [(str(random.Random(i).randrange(380)), f"leaf{i}") for i in range(40)],
+    ])
+    def test_large_trees(self, edges):
+        """Деревья, на которых distance_function_sums уходит в ветку БПФ; корни — выборочно"""
+        nodes, counts, total, _ = all_roots(edges)
+
+        for i in range(0, len(nodes), 37):
+            expected_counts, expected_total = brute_force_root(edges, nodes[i])
+            assert counts[i].tolist() == expected_counts
+            assert total[i] == pytest.approx(expected_total, rel=1e-9)
+
+    def test_empty(self):
+        nodes, counts, total, normalized = all_roots([])
+
+        assert nodes == []
+        assert counts.shape == (0, 5)
+        assert len(total) == len(normalized) == 0
+
+    @pytest.mark.parametrize("edges", [
+        [('a', 'b'), ('b', 'c'), ('c', 'a')],
+        [('a', 'b'), ('c', 'd')],
+        [('a', 'b'), ('b', 'c'), ('c', 'a'), ('d', 'e')],
+    ])
+    def test_not_a_tree(self, edges):
+        with pytest.raises(ValueError):
+            all_roots(edges)
+
+
+class TestRerootedTree:
+    """Суммы по всем корням против обхода в ширину из каждого узла"""
+
+    @pytest.mark.parametrize("edges", [
+        random_tree_edges(1, seed=0),
+        random_tree_edges(40, seed=6),
+        random_tree_edges(300, seed=7),
+        chain_edges(500),
+        star_edges(50),
+    ])
+    def test_distance_function_sums(self, edges):
+        graph = CompactGraph.from_pairs(edges, sorted({node for edge in edges for node in edge}) or ['0'])
+        n = len(graph)
+        tree = RerootedTree(graph)
+        f = np.random.default_rng(n).random(n)
+        offsets, neighbors = graph.adjacency
+
+        expected = np.zeros(n)
+        for source in range(n):
+            dist = {source: 0}
+            frontier = [source]
+            for node in frontier:
+                for neighbor in neighbors[offsets[node]:offsets[node + 1]].tolist():
+                    if neighbor not in dist:
+                        dist[neighbor] = dist[node] + 1
+                        frontier.append(neighbor)
+            expected[source] = sum(f[d] for d in dist.values())
+
+        np.testing.assert_allclose(tree.distance_function_sums(f), expected, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(tree.distance_sums(), tree.distance_function_sums(np.arange(n)), rtol=1e-12)
+
+    def test_integer_node_terms(self):
+        """Целочисленные вклады суммируются точно, без округления через float"""
+        tree = RerootedTree(CompactGraph.from_pairs(star_edges(6)))
+        sums = tree.node_term_sums(lambda children, has_parent, size: children * (children - 1))
+
+        assert sums.dtype == np.int64
+        # Корень в центре: 5 детей по 4 брата; корень в листе: у центра 4 ребенка
+        assert sums.tolist() == [20] + [12] * 5
+
+
+class TestMemmap:
+    """memmap_dir совпадает с плотными матрицами в памяти"""
+
+    @pytest.mark.parametrize("edges, root", TREES)
+    def test_matches_dense(self, tmp_path, monkeypatch, edges, root):
+        # Маленький блок: каждая матрица пишется за несколько отображений файла
+        monkeypatch.setattr(task1, 'write_dense', functools.partial(dense.write_dense, block_bytes=16))
+        tree, nodes = build_tree(edges, root)
+        matrices = build_matrices(tree, nodes, memmap_dir=str(tmp_path))
+
+        assert len(matrices) == 6
+        assert matrices[0] is matrices[1]
+        for matrix, expected in zip(matrices, build_matrices(tree, nodes)):
+            assert matrix.dtype == np.int8
+            np.testing.assert_array_equal(matrix, expected)
+
+        with open(tmp_path / 'index.json', encoding='utf-8') as f:
+            index = json.load(f)
+        assert index['nodes'] == nodes
+        assert index['shape'] == [len(nodes), len(nodes)]
+        assert index['files'] == {'A': 'r1.npy', 'r1': 'r1.npy', 'r2': 'r2.npy',
+                                  'r3': 'r3.npy', 'r4': 'r4.npy', 'r5': 'r5.npy'}
+        assert sorted(os.listdir(tmp_path)) == ['index.json', 'r1.npy', 'r2.npy', 'r3.npy', 'r4.npy', 'r5.npy']
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(text, name='edges.csv'):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+
+TREES_CSV = "\n".join(f"{u},{v}" for u, v in TREES[0][0])
+
+
+STREAMING_CSVS = [
+    ("root,A\nroot,B\nA,A1\nA,A2\nB,B1\nB,B2", 'root'),
+    # Пробелы, пустые строки, строки из одного столбца и пустые метки пропускаются
+    ("1, 2\n\n2 ,3\n4\n3,\n,5\n3,4\n2,5", '1'),
+    # Ребра против направления от корня и узел, недостижимый из него
+    ("b,a\nc,b\nd,b\nx,y", 'a'),
+    ("\n".join(f"{i},{i + 1}" for i in range(20)), '7'),
+]
+
+
+class TestStreaming:
+    """Потоковое чтение (chunk_size) совпадает с чтением через read_edges_from_csv"""
+
+    @pytest.mark.parametrize("text, root", STREAMING_CSVS)
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 1000])
+    def test_main_matches_default_path(self, write_csv, text, root, chunk_size):
+        path = write_csv(text)
+
+        assert load_compact_tree(path, root, chunk_size).labels == load_compact_tree(path, root).labels
+        for streamed, default in zip(main(path, root, chunk_size=chunk_size), main(path, root)):
+            np.testing.assert_array_equal(streamed, default)
+
+    @pytest.mark.parametrize("text, root", STREAMING_CSVS)
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 1000])
+    def test_chunk_boundaries(self, write_csv, text, root, chunk_size):
+        """Блоки не длиннее chunk_size, все кроме последнего — полные, ребра в порядке файла"""
+        path = write_csv(text)
+        edges = read_edges_from_csv(path)
+        chunks = list(read_edge_chunks(path, chunk_size))
+
+        assert all(len(src) == chunk_size for src, _ in chunks[:-1])
+        assert 0 < len(chunks[-1][0]) <= chunk_size
+        src, dst, labels = read_edge_arrays(path, chunk_size)
+        assert [(labels[u], labels[v]) for u, v in zip(src.tolist(), dst.tolist())] == edges
+
+    def test_invalid_chunk_size(self, write_csv):
+        with pytest.raises(ValueError):
+            main(write_csv("a,b"), 'a', chunk_size=0)
+
+
+class TestCache:
+    """main и load_compact_tree с кэшем по содержимому файла"""
+
+    def test_hit_skips_reading(self, write_csv, monkeypatch):
+        """Повторный вызов берет дерево из кэша и не читает CSV"""
+        path = write_csv(TREES_CSV)
+        cache = ContentCache()
+        expected = main(path, 'root')
+
+        first = main(path, 'root', cache=cache)
+        # Второй вызов не должен ни читать граф, ни строить его
+        monkeypatch.setattr(task1, 'load_graph', None)
+        monkeypatch.setattr(task1, 'read_edges_from_csv', None)
+        second = main(path, 'root', cache=cache)
+
+        for result in (first, second):
+            for matrix, dense_matrix in zip(result, expected):
+                np.testing.assert_array_equal(matrix, dense_matrix)
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_graph_shared_between_roots(self, write_csv):
+        """Граф хранится один раз на файл: другой корень — промах только по дереву"""
+        path = write_csv(TREES_CSV)
+        cache = ContentCache()
+        load_compact_tree(path, 'root', cache=cache)
+        tree = load_compact_tree(path, 'A', cache=cache)
+
+        assert (cache.hits, cache.misses) == (1, 3)
+        assert tree.to_dict() == load_compact_tree(path, 'A').to_dict()
+
+    @pytest.mark.parametrize("chunk_size", [None, 2])
+    def test_changed_content_invalidates(self, write_csv, chunk_size):
+        """Ключ — хэш содержимого: после перезаписи файла дерево строится заново"""
+        path = write_csv(TREES_CSV)
+        cache = ContentCache()
+        load_compact_tree(path, 'root', chunk_size, cache)
+        write_csv(TREES_CSV + "\nB2,C")
+        tree = load_compact_tree(path, 'root', chunk_size, cache)
+
+        assert 'C' in tree.labels
+        assert tree.to_dict() == load_compact_tree(path, 'root').to_dict()
+        assert cache.hits == 0
+
+    def test_disk_store(self, write_csv, tmp_path):
+        """Записи на диске переживают новый экземпляр кэша"""
+        path = write_csv(TREES_CSV)
+        main(path, 'root', lazy=True, cache=ContentCache(directory=str(tmp_path / 'cache')))
+        cache = ContentCache(directory=str(tmp_path / 'cache'))
+        tree = load_compact_tree(path, 'root', cache=cache)
+
+        assert cache.hits == 1
+        assert tree.to_dict() == load_compact_tree(path, 'root').to_dict()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,12 +1,25 @@
 import math
 import csv
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
-from typing import Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-def task(s: str, e: str) -> Tuple[float, float]:
+import numpy as np
+
+from common.cache import ContentCache, content_key
+from common.entropy import link_entropy, reference_entropy
+from common.graph import CompactGraph
+from common.reroot import RerootedTree
+
+# Структура для пакетного расчета: CSV-строка или массив ребер (m, 2) целых меток
+EdgesInput = Union[str, np.ndarray, Sequence[Tuple[int, int]]]
+
+
+def parse_edges(s: str, e: Optional[str]) -> Tuple[List[Tuple[str, str]], List[str]]:
     edges = []
     nodes = set()
-    
+
     reader = csv.reader(StringIO(s))
     for row in reader:
         if len(row) == 2:
@@ -14,46 +27,66 @@ def task(s: str, e: str) -> Tuple[float, float]:
             edges.append((source, target))
             nodes.add(source)
             nodes.add(target)
-    
-    nodes.add(e)
-    
+
+    if e is not None:
+        nodes.add(e)
+
     nodes = sorted(nodes, key=lambda x: int(x))
-    n = len(nodes)
-    node_to_index = {node: idx for idx, node in enumerate(nodes)}
-        
+    return edges, nodes
+
+
+def forest_relation_counts(edges: List[Tuple[str, str]], nodes: List[str]) -> Optional[Dict[str, List[int]]]:
+    """
+    Число связей l_ij каждого узла по отношениям r1-r5 без перечисления пар.
+
+    Для леса (у каждого узла не больше одного родителя, циклов нет) все l_ij
+    выражаются через глубину, размер поддерева, число детей и число братьев:
+      r1 — дети, r2 — родитель, r3 — потомки кроме детей (size - 1 - children),
+      r4 — предки кроме родителя (depth - 1), r5 — братья (children(parent) - 1).
+    Считается за один обход по common.graph.CompactTree, O(n). Если граф не лес,
+    возвращает None.
+    """
+    forest = CompactGraph.from_pairs(edges, nodes).as_forest()
+    if forest is None:
+        return None
+    return dict(zip(nodes, forest.relation_counts().tolist()))
+
+
+def enumerated_relation_counts(edges: List[Tuple[str, str]], nodes: List[str]) -> Dict[str, List[int]]:
+    """Число связей l_ij через явное построение списков пар r1-r5 (для произвольных графов)."""
     r1 = edges.copy()
-    
+
     r2 = [(target, source) for source, target in edges]
-    
+
     graph = {node: set() for node in nodes}
     for source, target in edges:
         graph[source].add(target)
-    
-    def get_all_descendants(node, visited=None):
-        if visited is None:
-            visited = set()
+
+    def get_all_descendants(node):
+        # Итеративный обход в глубину: глубина графа не ограничена стеком вызовов
         descendants = set()
-        for child in graph.get(node, set()):
-            if child not in visited:
-                visited.add(child)
-                descendants.add(child)
-                descendants |= get_all_descendants(child, visited)
+        stack = [node]
+        while stack:
+            for child in graph[stack.pop()]:
+                if child not in descendants:
+                    descendants.add(child)
+                    stack.append(child)
         return descendants
-    
+
     r3 = []
     for node in nodes:
         all_descendants = get_all_descendants(node)
-        direct_descendants = set(graph.get(node, set()))
+        direct_descendants = graph[node]
         indirect_descendants = all_descendants - direct_descendants
         for descendant in indirect_descendants:
             r3.append((node, descendant))
-    
+
     r4 = [(target, source) for source, target in r3]
-    
+
     parent_map = {}
     for source, target in edges:
         parent_map[target] = source
-    
+
     r5 = []
     siblings = {}
     for node in nodes:
@@ -62,48 +95,396 @@ def task(s: str, e: str) -> Tuple[float, float]:
             if parent not in siblings:
                 siblings[parent] = []
             siblings[parent].append(node)
-    
+
     for parent, children in siblings.items():
         if len(children) > 1:
             for i in range(len(children)):
                 for j in range(i + 1, len(children)):
                     r5.append((children[i], children[j]))
                     r5.append((children[j], children[i]))
-    
+
     relations = [r1, r2, r3, r4, r5]
-    relation_names = ['r1', 'r2', 'r3', 'r4', 'r5']
-    
-    lij_table = {node: {f'r{i+1}': 0 for i in range(5)} for node in nodes}
-    
+
+    counts = {node: [0] * 5 for node in nodes}
+
     for i, relation in enumerate(relations):
-        relation_name = f'r{i+1}'
         for source, target in relation:
-            if source in lij_table:
-                lij_table[source][relation_name] += 1
-    
+            if source in counts:
+                counts[source][i] += 1
+    return counts
+
+
+def entropy(counts: Dict[str, List[int]], nodes: List[str]) -> Tuple[float, float]:
+    n = len(nodes)
     max_possible_links = n - 1
     total_entropy = 0.0
-    
+
     for node in nodes:
         node_entropy = 0.0
-        for relation_name in relation_names:
-            lij = lij_table[node][relation_name]
+        for lij in counts[node]:
             if lij > 0:
                 P = lij / max_possible_links
                 H = -P * math.log2(P)
                 node_entropy += H
         total_entropy += node_entropy
-    
-    c = 1 / (math.e * math.log(2))  
-    k = 5  
-    H_ref = c * n * k
-    
-    h_normalized = total_entropy / H_ref
-    
+
+    h_normalized = total_entropy / reference_entropy(n)
+    return total_entropy, h_normalized
+
+
+def relation_counts(s: str, e: str) -> Tuple[Dict[str, List[int]], List[str]]:
+    """Разбор структуры и счетчики l_ij: (counts, nodes)."""
+    edges, nodes = parse_edges(s, e)
+
+    counts = forest_relation_counts(edges, nodes)
+    if counts is None:
+        counts = enumerated_relation_counts(edges, nodes)
+    return counts, nodes
+
+
+def task(s: str, e: str, cache: Optional[ContentCache] = None) -> Tuple[float, float]:
+    """
+    Энтропия структуры s (CSV-строка ребер) с корнем e и нормированная сложность.
+
+    cache — common.cache.ContentCache: счетчики l_ij хранятся по хэшу (s, e),
+    повторный вызов с той же структурой не разбирает CSV и не обходит граф.
+    """
+    if cache is None:
+        counts, nodes = relation_counts(s, e)
+    else:
+        counts, nodes = cache.get_or_compute(content_key('task2.counts', s, e),
+                                             lambda: relation_counts(s, e))
+
+    total_entropy, h_normalized = entropy(counts, nodes)
+
     return round(total_entropy, 1), round(h_normalized, 1)
 
+def encode_structure(edges: EdgesInput, e) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Переводит структуру в номера узлов: (src, dst, nodes), где nodes упорядочены
+    так же, как в task (по числовому значению меток).
+    """
+    if isinstance(edges, str):
+        edge_list, nodes = parse_edges(edges, e)
+        index = {node: i for i, node in enumerate(nodes)}
+        codes = np.array([index[node] for edge in edge_list for node in edge], dtype=np.int64)
+        return codes[0::2], codes[1::2], nodes
+    pairs = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    labels, codes = np.unique(np.append(pairs.ravel(), int(e)), return_inverse=True)
+    codes = codes[:-1]
+    return codes[0::2], codes[1::2], [str(label) for label in labels]
+
+
+def batch_relation_counts(encoded: List[Tuple[np.ndarray, np.ndarray, List[str]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Счетчики l_ij сразу для всех структур: (counts, sizes), где counts — матрица
+    (сумма n, 5), а sizes — число узлов каждой структуры.
+
+    Структуры склеиваются в один лес со сдвигом номеров узлов. Глубины считаются
+    удвоением указателей (O(log глубины) векторных шагов), размеры поддеревьев —
+    по уровням снизу вверх. Структуры, не являющиеся лесом, считаются через
+    enumerated_relation_counts.
+    """
+    sizes = np.array([len(nodes) for _, _, nodes in encoded], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    total = int(offsets[-1])
+    owner = np.repeat(np.arange(len(encoded)), sizes)
+    if encoded:
+        src = np.concatenate([codes + offsets[i] for i, (codes, _, _) in enumerate(encoded)])
+        dst = np.concatenate([codes + offsets[i] for i, (_, codes, _) in enumerate(encoded)])
+    else:
+        src = dst = np.empty(0, dtype=np.int64)
+
+    children = np.bincount(src, minlength=total)
+    in_degree = np.bincount(dst, minlength=total)
+    parent = np.full(total, -1, dtype=np.int64)
+    parent[dst] = src
+
+    # Удвоение указателей: после каждого шага jump[v] — предок на вдвое большем расстоянии
+    depth = (parent >= 0).astype(np.int64)
+    jump = parent.copy()
+    for _ in range(max(total, 1).bit_length() + 1):
+        active = np.nonzero(jump >= 0)[0]
+        if len(active) == 0:
+            break
+        targets = jump[active]
+        depth[active] += depth[targets]
+        jump[active] = jump[targets]
+    broken = np.zeros(len(encoded), dtype=bool)
+    broken[owner[in_degree > 1]] = True
+    broken[owner[jump >= 0]] = True
+
+    size = np.ones(total, dtype=np.int64)
+    good = np.nonzero(~broken[owner] & (parent >= 0))[0]
+    by_depth = good[np.argsort(depth[good], kind='stable')]
+    bounds = np.searchsorted(depth[by_depth], np.arange(depth[good].max(initial=0) + 2))
+    for level in range(len(bounds) - 2, 0, -1):
+        nodes_at_level = by_depth[bounds[level]:bounds[level + 1]]
+        np.add.at(size, parent[nodes_at_level], size[nodes_at_level])
+
+    has_parent = parent >= 0
+    counts = np.zeros((total, 5), dtype=np.int64)
+    counts[:, 0] = children
+    counts[:, 1] = has_parent
+    counts[:, 2] = size - 1 - children
+    counts[:, 3] = np.maximum(depth - 1, 0)
+    counts[has_parent, 4] = children[parent[has_parent]] - 1
+
+    for i in np.nonzero(broken)[0]:
+        src_codes, dst_codes, nodes = encoded[i]
+        edge_list = [(nodes[u], nodes[v]) for u, v in zip(src_codes.tolist(), dst_codes.tolist())]
+        exact = enumerated_relation_counts(edge_list, nodes)
+        counts[offsets[i]:offsets[i + 1]] = [exact[node] for node in nodes]
+    return counts, sizes
+
+
+def _encoded_counts(structures) -> Tuple[np.ndarray, np.ndarray]:
+    return batch_relation_counts([encode_structure(edges, e) for edges, e in structures])
+
+
+def task_batch(structures: Sequence[Tuple[EdgesInput, str]],
+               processes: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Энтропия и нормированная сложность для многих структур (edges, e) за один вызов.
+
+    edges — CSV-строка, как в task, или массив ребер (m, 2) с целыми метками.
+    Возвращает два массива, округленных до одного знака, как в task.
+    При processes > 1 разбор и подсчет l_ij распределяются по пулу процессов,
+    а итоговая энтропия считается векторно в основном процессе.
+    """
+    structures = list(structures)
+    if processes and processes > 1 and len(structures) > 1:
+        step = -(-len(structures) // processes)
+        parts = [structures[i:i + step] for i in range(0, len(structures), step)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_encoded_counts, parts))
+        counts = np.concatenate([part_counts for part_counts, _ in results])
+        sizes = np.concatenate([part_sizes for _, part_sizes in results])
+    else:
+        counts, sizes = _encoded_counts(structures)
+
+    owner = np.repeat(np.arange(len(sizes)), sizes)
+    max_possible_links = np.maximum(sizes - 1, 1)[owner, None]
+    H = link_entropy(counts, max_possible_links)
+    total_entropy = np.bincount(owner, weights=H.sum(axis=1), minlength=len(sizes))
+    h_normalized = total_entropy / reference_entropy(np.maximum(sizes, 1))
+    # Встроенный round, а не np.round: на половинках (0.15 -> 0.1) они расходятся
+    return (np.array([round(float(x), 1) for x in total_entropy]),
+            np.array([round(float(x), 1) for x in h_normalized]))
+
+
+def root_entropies(s: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Энтропия и нормированная сложность структуры s для каждого возможного корня.
+
+    Ребра s считаются неориентированным деревом; для корня r они направляются от r,
+    и результат равен task(csv, r) для так переориентированной структуры (без
+    округления). Счетчики l_ij выражаются через число детей, размер поддерева и
+    глубину (forest_relation_counts), поэтому все корни считаются сразу через
+    common.reroot.RerootedTree: O(n log^2 n) вместо n вызовов task.
+    Возвращает (nodes, entropies, normalized). Если s не дерево, бросает ValueError.
+    """
+    edges, nodes = parse_edges(s, None)
+    n = len(nodes)
+    if n == 0:
+        return nodes, np.zeros(0), np.zeros(0)
+    tree = RerootedTree(CompactGraph.from_pairs(edges, nodes))
+    # r3 — потомки кроме детей, r4 — предки кроме родителя
+    total_entropy = tree.relation_entropy(lambda children, size: size - 1 - children,
+                                          lambda depth: np.maximum(depth - 1, 0))
+    return nodes, total_entropy, total_entropy / reference_entropy(n)
+
+
+def rank_roots(s: str, maximize: bool = False) -> List[Tuple[str, float, float]]:
+    """
+    Корни структуры s, упорядоченные по энтропии (по возрастанию, при maximize=True —
+    по убыванию): список (root, entropy, normalized), значения округлены, как в task.
+    Нормировка одинакова для всех корней, поэтому порядок по обеим величинам
+    совпадает; при равной энтропии корни идут в порядке nodes.
+    """
+    nodes, total_entropy, h_normalized = root_entropies(s)
+    order = np.argsort(-total_entropy if maximize else total_entropy, kind='stable')
+    return [(nodes[i], round(float(total_entropy[i]), 1), round(float(h_normalized[i]), 1))
+            for i in order.tolist()]
+
+
+class StructureEntropy:
+    """
+    Энтропия структуры с пошаговыми изменениями: add_edge, remove_edge, reparent.
+
+    Состояние задается так же, как у task (CSV-строка и корень e), граф должен быть
+    лесом. Хранятся родитель, дети, глубина и размер поддерева каждого узла, счетчики
+    l_ij, их сумма S0 = sum(l) и гистограмма значений l, по которой считается
+    S1 = sum(l * log2 l) (math.fsum, без накопления ошибок округления при
+    многократных изменениях). Тогда при N = n - 1
+
+        H = sum(-(l / N) * log2(l / N)) = (S0 * log2 N - S1) / N,
+
+    и изменение числа узлов не требует пересчета вклада каждого узла.
+
+    Операция над ребром (p, x) пересчитывает предков p и q (r1, r3), братьев x
+    (r5) и узлы поддерева x, у которых меняется глубина (r4): O(глубина + число
+    братьев + размер перемещаемого поддерева).
+    """
+
+    def __init__(self, s: str, e: str):
+        edges, nodes = parse_edges(s, e)
+        if forest_relation_counts(edges, nodes) is None:
+            raise ValueError("StructureEntropy requires a forest: each node must have at most one parent and no cycles")
+        self.root = e
+        self.parent: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {node: [] for node in nodes}
+        self.depth: Dict[str, int] = {node: 0 for node in nodes}
+        self.size: Dict[str, int] = {node: 1 for node in nodes}
+        self.counts: Dict[str, List[int]] = {node: [0] * 5 for node in nodes}
+        self._s0 = 0
+        self._histogram: Counter = Counter()
+        for source, target in edges:
+            self.parent[target] = source
+            self.children[source].append(target)
+        order = [node for node in nodes if node not in self.parent]
+        for node in order:
+            for child in self.children[node]:
+                self.depth[child] = self.depth[node] + 1
+                order.append(child)
+        for node in reversed(order):
+            if node in self.parent:
+                self.size[self.parent[node]] += self.size[node]
+        for node in nodes:
+            self._refresh(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self.children, key=lambda x: int(x))
+
+    @property
+    def total_entropy(self) -> float:
+        max_possible_links = len(self.children) - 1
+        if max_possible_links <= 0:
+            return 0.0
+        s1 = math.fsum(count * lij * math.log2(lij) for lij, count in self._histogram.items())
+        return (self._s0 * math.log2(max_possible_links) - s1) / max_possible_links
+
+    @property
+    def normalized(self) -> float:
+        return self.total_entropy / reference_entropy(len(self.children))
+
+    def result(self) -> Tuple[float, float]:
+        """Та же пара значений, что возвращает task для текущей структуры."""
+        return round(self.total_entropy, 1), round(self.normalized, 1)
+
+    def to_csv(self) -> str:
+        """Текущий список ребер в формате входа task."""
+        return "\n".join(f"{source},{target}" for target, source in self.parent.items())
+
+    def add_edge(self, u: str, v: str) -> None:
+        """Добавляет ребро u -> v; v (со своим поддеревом) становится ребенком u."""
+        if u == v:
+            raise ValueError(f"Edge '{u},{v}' would create a cycle")
+        if v in self.parent:
+            raise ValueError(f"Node '{v}' already has parent '{self.parent[v]}'")
+        for node in (u, v):
+            if node not in self.children:
+                self.children[node] = []
+                self.depth[node] = 0
+                self.size[node] = 1
+                self.counts[node] = [0] * 5
+        if self._is_in_subtree(u, v):
+            raise ValueError(f"Edge '{u},{v}' would create a cycle")
+        self._attach(u, v)
+
+    def remove_edge(self, u: str, v: str) -> None:
+        """Удаляет ребро u -> v; узлы, оставшиеся без связей (кроме корня e), исчезают."""
+        if self.parent.get(v) != u:
+            raise ValueError(f"Edge '{u},{v}' not found")
+        self._detach(v)
+        self._drop_if_isolated(u)
+        self._drop_if_isolated(v)
+
+    def reparent(self, x: str, new_parent: str) -> None:
+        """Переносит поддерево x под узел new_parent."""
+        if x not in self.parent:
+            raise ValueError(f"Node '{x}' has no parent")
+        if new_parent not in self.children:
+            raise ValueError(f"Node '{new_parent}' not found")
+        if self._is_in_subtree(new_parent, x):
+            raise ValueError(f"Cannot move '{x}' under its own descendant '{new_parent}'")
+        old_parent = self.parent[x]
+        self._detach(x)
+        self._attach(new_parent, x)
+        self._drop_if_isolated(old_parent)
+
+    def _is_in_subtree(self, node: str, top: str) -> bool:
+        while node is not None:
+            if node == top:
+                return True
+            node = self.parent.get(node)
+        return False
+
+    def _set_counts(self, node: str, counts: List[int]) -> None:
+        for lij in self.counts[node]:
+            if lij > 0:
+                self._s0 -= lij
+                self._histogram[lij] -= 1
+                if not self._histogram[lij]:
+                    del self._histogram[lij]
+        for lij in counts:
+            if lij > 0:
+                self._s0 += lij
+                self._histogram[lij] += 1
+        self.counts[node] = counts
+
+    def _refresh(self, node: str) -> None:
+        k = len(self.children[node])
+        parent = self.parent.get(node)
+        if parent is None:
+            self._set_counts(node, [k, 0, self.size[node] - 1 - k, 0, 0])
+        else:
+            self._set_counts(node, [k, 1, self.size[node] - 1 - k, self.depth[node] - 1,
+                                    len(self.children[parent]) - 1])
+
+    def _shift_depth(self, top: str, depth: int) -> None:
+        """Проставляет глубины поддерева top (итеративно) и обновляет их счетчики."""
+        stack = [(top, depth)]
+        while stack:
+            node, node_depth = stack.pop()
+            self.depth[node] = node_depth
+            self._refresh(node)
+            stack.extend((child, node_depth + 1) for child in self.children[node])
+
+    def _update_path(self, start: str, delta: int) -> None:
+        ancestor = start
+        while ancestor is not None:
+            self.size[ancestor] += delta
+            self._refresh(ancestor)
+            ancestor = self.parent.get(ancestor)
+
+    def _detach(self, x: str) -> None:
+        p = self.parent.pop(x)
+        self.children[p].remove(x)
+        for sibling in self.children[p]:
+            self._refresh(sibling)
+        self._update_path(p, -self.size[x])
+        self._shift_depth(x, 0)
+
+    def _attach(self, q: str, x: str) -> None:
+        self.parent[x] = q
+        self.children[q].append(x)
+        for sibling in self.children[q]:
+            if sibling != x:
+                self._refresh(sibling)
+        self._update_path(q, self.size[x])
+        self._shift_depth(x, self.depth[q] + 1)
+
+    def _drop_if_isolated(self, node: str) -> None:
+        if node != self.root and node not in self.parent and not self.children[node]:
+            self._set_counts(node, [0] * 5)
+            for table in (self.children, self.depth, self.size, self.counts):
+                del table[node]
+
+
 if __name__ == "__main__":
     csv_string = "1,2\n1,3\n3,4\n3,5"
     root = "1"
     result = task(csv_string, root)
-    print(f"Энтропия: {result[0]}, Нормированная сложность: {result[1]}")
\ No newline at end of file
+    print(f"Энтропия: {result[0]}, Нормированная сложность: {result[1]}")
@@ -2,7 +2,10 @@
 Тесты для функции task из модуля task2
 """
 import pytest
-from task2 import task
+import numpy as np
+from task2 import (task, task_batch, StructureEntropy, parse_edges, forest_relation_counts,
+                   enumerated_relation_counts, root_entropies, rank_roots)
+from common.cache import ContentCache
 
 
 class TestBasicFunctionality:
@@ -222,5 +225,247 @@ class TestComplexTrees:
         assert normalized > 0
 
 
+class TestClosedFormCounts:
+    """Тесты подсчета l_ij по глубине и размерам поддеревьев"""
+    
+    def test_matches_enumeration_on_trees(self):
+        """Формулы для леса совпадают с явным перечислением пар"""
+        cases = [
+            ("1,2\n1,3\n3,4\n3,5", "1"),
+            ("1,2\n2,3\n3,4\n3,5\n3,6\n3,7", "1"),
+            ("1,2\n1,3\n1,4\n2,5\n2,6\n3,7\n3,8\n4,9\n4,10", "1"),
+            ("1,2\n3,4", "5"),
+        ]
+        for csv_string, root in cases:
+            edges, nodes = parse_edges(csv_string, root)
+            assert forest_relation_counts(edges, nodes) == enumerated_relation_counts(edges, nodes)
+    
+    def test_known_counts(self):
+        """Счетчики r1-r5 для дерева из примера"""
+        edges, nodes = parse_edges("1,2\n1,3\n3,4\n3,5", "1")
+        counts = forest_relation_counts(edges, nodes)
+        
+        assert counts["1"] == [2, 0, 2, 0, 0]
+        assert counts["3"] == [2, 1, 0, 0, 1]
+        assert counts["4"] == [0, 1, 0, 1, 1]
+    
+    def test_not_a_forest(self):
+        """Для графов с двумя родителями или циклом формулы неприменимы"""
+        for csv_string in ["1,3\n2,3", "1,2\n2,3\n3,1", "1,2\n1,2"]:
+            edges, nodes = parse_edges(csv_string, "1")
+            assert forest_relation_counts(edges, nodes) is None
+    
+    def test_non_forest_falls_back(self):
+        """task продолжает работать на графах, не являющихся деревом"""
+        entropy, normalized = task("1,2\n1,3\n2,4\n3,4", "1")
+        
+        assert entropy > 0
+        assert normalized > 0
+
+
+class TestDeepStructures:
+    """Тесты на цепочках глубже лимита рекурсии"""
+    
+    def test_long_chain(self):
+        """Цепочка из 100 000 узлов обрабатывается без RecursionError"""
+        n = 100_000
+        csv_string = "\n".join(f"{i},{i + 1}" for i in range(1, n))
+        entropy, normalized = task(csv_string, "1")
+        
+        assert entropy > 0
+        assert normalized > 0
+    
+    def test_long_chain_not_a_forest(self):
+        """Глубокий граф с двумя родителями у узла (путь без формул для леса)"""
+        n = 1_500
+        csv_string = "\n".join(f"{i},{i + 1}" for i in range(1, n)) + f"\n1,{n}"
+        edges, nodes = parse_edges(csv_string, "1")
+        counts = enumerated_relation_counts(edges, nodes)
+        
+        assert counts["1"][2] == n - 3
+        assert counts[str(n)][3] == n - 3
+
+
+class TestBatch:
+    """Тесты пакетного расчета task_batch"""
+    
+    STRUCTURES = [
+        ("1,2\n1,3\n3,4\n3,5", "1"),
+        ("1,2\n2,3\n3,4", "1"),
+        ("1,2\n1,3\n1,4\n1,5\n1,6", "1"),
+        ("1,2\n1,3\n2,4\n3,4", "1"),
+        ("", "1"),
+    ]
+    
+    def test_matches_task(self):
+        """Результаты совпадают с поэлементным вызовом task"""
+        entropies, normalized = task_batch(self.STRUCTURES)
+        
+        for i, (csv_string, root) in enumerate(self.STRUCTURES):
+            assert (entropies[i], normalized[i]) == task(csv_string, root)
+    
+    def test_array_input(self):
+        """Ребра в виде массива целых меток"""
+        edges = np.array([[1, 2], [1, 3], [3, 4], [3, 5]])
+        entropies, normalized = task_batch([(edges, 1), ("1,2\n1,3\n3,4\n3,5", "1")])
+        
+        assert entropies[0] == entropies[1]
+        assert normalized[0] == normalized[1]
+    
+    def test_matches_task_random(self):
+        """Совпадение с task на случайных деревьях, включая округление"""
+        rng = np.random.default_rng(0)
+        structures = []
+        for _ in range(200):
+            n = int(rng.integers(2, 40))
+            structures.append(("\n".join(f"{rng.integers(1, i)},{i}" for i in range(2, n + 1)), "1"))
+        entropies, normalized = task_batch(structures)
+        
+        for i, (csv_string, root) in enumerate(structures):
+            assert (entropies[i], normalized[i]) == task(csv_string, root)
+    
+    def test_process_pool(self):
+        """Распределение по процессам не меняет результат"""
+        serial = task_batch(self.STRUCTURES)
+        parallel = task_batch(self.STRUCTURES, processes=2)
+        
+        np.testing.assert_array_equal(serial[0], parallel[0])
+        np.testing.assert_array_equal(serial[1], parallel[1])
+
+
+class TestStructureEntropy:
+    """Тесты пошагового пересчета энтропии"""
+    
+    def test_initial_state_matches_task(self):
+        """Начальное состояние совпадает с task"""
+        structure = StructureEntropy("1,2\n1,3\n3,4\n3,5", "1")
+        
+        assert structure.result() == task("1,2\n1,3\n3,4\n3,5", "1")
+    
+    def test_reparent_matches_recompute(self):
+        """Перенос поддерева совпадает с полным пересчетом"""
+        structure = StructureEntropy("1,2\n1,3\n3,4\n3,5\n5,6", "1")
+        structure.reparent("5", "2")
+        
+        assert structure.result() == task("1,2\n1,3\n3,4\n2,5\n5,6", "1")
+    
+    def test_add_and_remove_edge(self):
+        """Добавление и удаление ребер, включая новые узлы"""
+        structure = StructureEntropy("1,2\n1,3", "1")
+        structure.add_edge("3", "4")
+        structure.add_edge("4", "5")
+        assert structure.result() == task("1,2\n1,3\n3,4\n4,5", "1")
+        
+        structure.remove_edge("1", "2")
+        assert "2" not in structure.nodes
+        assert structure.result() == task("1,3\n3,4\n4,5", "1")
+    
+    def test_sequence_matches_recompute(self):
+        """Серия изменений не накапливает погрешность"""
+        structure = StructureEntropy("1,2\n1,3\n2,4\n2,5\n3,6\n3,7", "1")
+        for x, target in [("4", "3"), ("6", "5"), ("2", "7"), ("4", "1"), ("6", "1")]:
+            structure.reparent(x, target)
+            assert structure.result() == task(structure.to_csv(), "1")
+    
+    def test_invalid_operations(self):
+        """Циклы, второй родитель и отсутствующие ребра отклоняются"""
+        structure = StructureEntropy("1,2\n2,3", "1")
+        
+        with pytest.raises(ValueError):
+            structure.add_edge("3", "1")
+        with pytest.raises(ValueError):
+            structure.add_edge("1", "3")
+        with pytest.raises(ValueError):
+            structure.remove_edge("1", "3")
+        with pytest.raises(ValueError):
+            structure.reparent("2", "3")
+        with pytest.raises(ValueError):
+            StructureEntropy("1,3\n2,3", "1")
+
+
+
+class TestRootSearch:
+    """Тесты поиска корня по энтропии"""
+    
+    @staticmethod
+    def oriented(csv_string, root):
+        """Та же структура с ребрами, направленными от root (обход в ширину)"""
+        edges, _ = parse_edges(csv_string, root)
+        adjacency = {}
+        for u, v in edges:
+            adjacency.setdefault(u, []).append(v)
+            adjacency.setdefault(v, []).append(u)
+        seen, queue, oriented = {root}, [root], []
+        for node in queue:
+            for neighbor in adjacency.get(node, []):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+                    oriented.append(f"{node},{neighbor}")
+        return "\n".join(oriented)
+    
+    def test_matches_task_for_every_root(self):
+        """Энтропия для каждого корня совпадает с task на переориентированной структуре"""
+        csv_string = "2,1\n1,3\n4,3\n3,5\n5,6\n7,5\n2,8"
+        nodes, entropies, normalized = root_entropies(csv_string)
+        
+        assert nodes == [str(i) for i in range(1, 9)]
+        for i, root in enumerate(nodes):
+            expected = task(self.oriented(csv_string, root), root)
+            assert (round(entropies[i], 1), round(normalized[i], 1)) == expected
+    
+    def test_ranking(self):
+        """Корни упорядочены по энтропии, maximize меняет порядок"""
+        csv_string = "1,2\n1,3\n3,4\n3,5"
+        ranking = rank_roots(csv_string)
+        
+        assert ranking[0][0] == "3"
+        assert [item[1] for item in ranking] == sorted(item[1] for item in ranking)
+        assert rank_roots(csv_string, maximize=True)[0][1] == max(item[1] for item in ranking)
+        assert len(ranking) == 5
+    
+    def test_not_a_tree(self):
+        """Циклы и несвязные структуры отклоняются"""
+        with pytest.raises(ValueError):
+            root_entropies("1,2\n2,3\n3,1")
+        with pytest.raises(ValueError):
+            root_entropies("1,2\n3,4")
+
+
+class TestCache:
+    """Тесты кэширования по содержимому"""
+    
+    def test_cached_result_matches(self):
+        """Результат с кэшем совпадает с обычным, повторный вызов — попадание в кэш"""
+        cache = ContentCache()
+        s = "1,2\n1,3\n3,4\n3,5"
+        
+        assert task(s, "1", cache=cache) == task(s, "1")
+        assert task(s, "1", cache=cache) == task(s, "1")
+        assert (cache.hits, cache.misses) == (1, 1)
+        
+        task(s, "2", cache=cache)
+        assert cache.misses == 2
+    
+    def test_lru_eviction(self):
+        """В памяти остается не больше maxsize записей"""
+        cache = ContentCache(maxsize=2)
+        for s in ["1,2", "1,2\n2,3", "1,2\n2,3\n3,4"]:
+            task(s, "1", cache=cache)
+        
+        assert len(cache) == 2
+        task("1,2", "1", cache=cache)
+        assert cache.misses == 4
+    
+    def test_disk_store(self, tmp_path):
+        """Записи на диске переживают новый экземпляр кэша"""
+        s = "1,2\n2,3\n2,4"
+        task(s, "1", cache=ContentCache(directory=str(tmp_path)))
+        
+        cache = ContentCache(directory=str(tmp_path))
+        assert task(s, "1", cache=cache) == task(s, "1")
+        assert cache.hits == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+"""
+Попарное сравнение всех экспертных ранжировок из каталога.
+
+Каталог читается один раз: каждая ранжировка (*.json или двоичный *.rnk)
+переводится в массив позиций общего набора объектов, и все массивы
+складываются в матрицу (N, n) в разделяемой памяти (multiprocessing.shared_memory).
+Процессы пула подключаются к ней без копирования и считают для каждой пары
+экспертов размер ядра противоречий и согласованную ранжировку. Результаты
+выводятся в формате JSON Lines по мере готовности, итоговая пропускная
+способность — в stderr.
+
+Запуск из корня репозитория:
+    python -m task3.all_pairs task3/data --pattern "Ранжировка*" -o pairs.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from itertools import combinations
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from task3.task3 import consistent_clusters, count_core_pairs, load_ranking_binary, parse_ranking
+
+# Состояние процесса пула: матрица позиций в разделяемой памяти и список объектов
+_shared = {}
+
+
+def load_rankings(directory, pattern='*'):
+    """
+    Читает ранжировки каталога: (имена, ParsedRanking). Файлы *.rnk открываются
+    через load_ranking_binary, *.json — через parse_ranking.
+    """
+    names, rankings = [], []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not fnmatch(name, pattern) or not os.path.isfile(path):
+            continue
+        if name.endswith('.rnk'):
+            rankings.append(load_ranking_binary(path))
+        elif name.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                rankings.append(parse_ranking(f.read()))
+        else:
+            continue
+        names.append(name)
+    return names, rankings
+
+
+def position_matrix(names, rankings):
+    """
+    Матрица позиций (N, n) по объектам первой ранжировки и список объектов.
+    Ранжировки с другим набором объектов пропускаются с предупреждением в stderr.
+    """
+    if not rankings:
+        return [], np.zeros((0, 0), dtype=np.int64), []
+    reference = rankings[0]
+    kept, rows = [], []
+    for name, ranking in zip(names, rankings):
+        if len(ranking.ids) != len(reference.ids) or not np.array_equal(ranking.sorted_ids,
+                                                                        reference.sorted_ids):
+            print(f"skipping {name}: objects differ from {names[0]}", file=sys.stderr)
+            continue
+        kept.append(name)
+        rows.append(ranking.positions_of(reference))
+    return kept, np.array(rows, dtype=np.int64).reshape(len(rows), len(reference.ids)), reference.objects
+
+
+def _attach(shm_name, shape, objects):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _shared['shm'] = shm
+    _shared['positions'] = np.ndarray(shape, dtype=np.int64, buffer=shm.buf)
+    _shared['objects'] = objects
+
+
+def _compare(pair):
+    """Размер ядра и согласованная ранжировка для пары экспертов (k, l)"""
+    k, l = pair
+    positions = _shared['positions']
+    objects = _shared['objects']
+    pos_a, pos_b = positions[k], positions[l]
+    core_size = count_core_pairs(pos_a, pos_b)
+    members, offsets = consistent_clusters(pos_a, pos_b)
+    members = members.tolist()
+    offsets = offsets.tolist()
+    consistent_ranking = [objects[members[lo]] if hi - lo == 1 else [objects[node] for node in members[lo:hi]]
+                          for lo, hi in zip(offsets, offsets[1:])]
+    return k, l, core_size, consistent_ranking
+
+
+def iter_all_pairs(positions, objects, processes=None, chunksize=16):
+    """
+    Перебирает результаты (k, l, размер ядра, согласованная ранжировка) для всех
+    пар k < l строк матрицы positions. При processes > 1 пары распределяются по
+    пулу процессов, а матрица передается им через разделяемую память.
+    """
+    pairs = list(combinations(range(len(positions)), 2))
+    if not processes or processes <= 1 or len(pairs) <= 1:
+        _shared['positions'] = positions
+        _shared['objects'] = objects
+        yield from map(_compare, pairs)
+        return
+
+    shm = shared_memory.SharedMemory(create=True, size=max(positions.nbytes, 1))
+    try:
+        np.ndarray(positions.shape, dtype=np.int64, buffer=shm.buf)[:] = positions
+        with ProcessPoolExecutor(max_workers=processes, initializer=_attach,
+                                 initargs=(shm.name, positions.shape, objects)) as pool:
+            yield from pool.map(_compare, pairs, chunksize=chunksize)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ядра противоречий и согласованные ранжировки "
+                                                 "для всех пар ранжировок каталога")
+    parser.add_argument('directory', help="каталог с ранжировками (*.json, *.rnk)")
+    parser.add_argument('--pattern', default='*', help="шаблон имен файлов, например 'Ранжировка*'")
+    parser.add_argument('-p', '--processes', type=int, default=os.cpu_count(), help="число процессов")
+    parser.add_argument('-o', '--output', help="файл JSON Lines (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    names, rankings = load_rankings(args.directory, args.pattern)
+    names, positions, objects = position_matrix(names, rankings)
+    loaded = time.perf_counter()
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    done = 0
+    try:
+        for k, l, core_size, consistent_ranking in iter_all_pairs(positions, objects, args.processes):
+            out.write(json.dumps({"a": names[k], "b": names[l], "core_size": core_size,
+                                  "consistent_ranking": consistent_ranking}, ensure_ascii=False) + '\n')
+            done += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - loaded
+    rate = done / elapsed if elapsed > 0 else float('inf')
+    print(f"{len(names)} rankings, {positions.shape[1]} objects: loaded in {loaded - start:.3f} s, "
+          f"{done} pairs in {elapsed:.3f} s ({rate:.1f} pairs/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 import json
 import numpy as np
+from functools import cached_property
 from itertools import combinations
 
+from common.cache import ContentCache, content_key
+
 def flatten_ranking(ranking):
     """Разворачивает кластерную ранжировку в плоский список объектов"""
     objects = []
@@ -12,11 +15,8 @@ def flatten_ranking(ranking):
             objects.append(item)
     return sorted(objects)
 
-def ranking_to_matrix(ranking, objects):
-    """Преобразует ранжировку в матрицу отношений"""
-    n = len(objects)
-    matrix = np.zeros((n, n), dtype=int)
-    
+def ranking_positions(ranking):
+    """Позиция (номер элемента верхнего уровня) каждого объекта в ранжировке"""
     positions = {}
     pos = 0
     for cluster in ranking:
@@ -24,82 +24,477 @@ def ranking_to_matrix(ranking, objects):
         for obj in cluster_list:
             positions[obj] = pos
         pos += 1
+    return positions
+
+def ranking_to_matrix(ranking, objects):
+    """Преобразует ранжировку в матрицу отношений"""
+    positions = ranking_positions(ranking)
+    pos = np.array([positions[obj] for obj in objects], dtype=np.int64).reshape(-1)
+    return (pos[:, None] <= pos[None, :]).astype(int)
+
+def first_positions(ranking):
+    """Объект -> номер первого элемента ранжировки, в котором он встречается"""
+    positions = {}
+    for pos, item in enumerate(ranking):
+        for obj in (item if isinstance(item, list) else [item]):
+            positions.setdefault(obj, pos)
+    return positions
+
+class ParsedRanking:
+    """
+    Разобранная кластерная ранжировка.
+
+    ids — объекты в порядке ранжировки, positions — номер элемента верхнего
+    уровня для каждого из них, boundaries — границы элементов: k-й элемент
+    ранжировки — ids[boundaries[k]:boundaries[k + 1]]. Массивы только для чтения,
+    словари позиций и отсортированный список объектов считаются один раз и
+    кэшируются, поэтому один объект можно сравнивать с любым числом ранжировок.
+    """
+    
+    def __init__(self, ranking):
+        sizes = [len(item) if isinstance(item, list) else 1 for item in ranking]
+        flat = [obj for item in ranking for obj in (item if isinstance(item, list) else [item])]
+        ids = np.array(flat, dtype=np.int64 if all(type(obj) is int for obj in flat) else object)
+        boundaries = np.zeros(len(ranking) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=boundaries[1:])
+        self._set_arrays(ids, boundaries)
+    
+    @classmethod
+    def from_arrays(cls, ids, boundaries):
+        """
+        Ранжировка по готовым массивам (например, np.memmap из load_ranking_binary).
+        """
+        parsed = cls.__new__(cls)
+        parsed._set_arrays(ids, boundaries)
+        return parsed
+    
+    def _set_arrays(self, ids, boundaries):
+        self.ids = ids
+        self.boundaries = boundaries
+        for array in (self.ids, self.boundaries):
+            array.setflags(write=False)
+    
+    def __len__(self):
+        return len(self.boundaries) - 1
+    
+    @property
+    def ranking(self):
+        """
+        Ранжировка в виде вложенных списков, как после json.loads; строится из ids и
+        boundaries при каждом обращении и не хранится, чтобы в кэше разбора лежали
+        только массивы. Кластер из одного объекта становится самим объектом.
+        """
+        ids = self.ids.tolist()
+        bounds = self.boundaries.tolist()
+        return [ids[lo] if hi - lo == 1 else ids[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+    
+    @cached_property
+    def positions(self):
+        """Номер элемента верхнего уровня для каждого объекта из ids"""
+        array = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.boundaries))
+        array.setflags(write=False)
+        return array
+    
+    @cached_property
+    def _order(self):
+        return np.argsort(self.ids, kind='stable')
+    
+    @cached_property
+    def sorted_ids(self):
+        """Объекты по возрастанию в виде массива"""
+        array = self.ids[self._order]
+        array.setflags(write=False)
+        return array
+    
+    @cached_property
+    def objects(self):
+        """Отсортированный список объектов, как flatten_ranking"""
+        return self.sorted_ids.tolist()
+    
+    @cached_property
+    def position_map(self):
+        """Объект -> позиция, как ranking_positions"""
+        return dict(zip(self.ids.tolist(), self.positions.tolist()))
+    
+    @cached_property
+    def first_position_map(self):
+        """Объект -> позиция первого вхождения, как first_positions"""
+        positions = {}
+        for obj, pos in zip(self.ids.tolist(), self.positions.tolist()):
+            positions.setdefault(obj, pos)
+        return positions
     
-    for i, obj_i in enumerate(objects):
-        for j, obj_j in enumerate(objects):
-            if positions[obj_i] <= positions[obj_j]:
-                matrix[i][j] = 1
-    return matrix
+    @cached_property
+    def object_positions(self):
+        """Позиции объектов self.objects в этой ранжировке"""
+        sorted_ids = self.sorted_ids
+        if (sorted_ids[1:] == sorted_ids[:-1]).any():
+            # Повторяющийся объект получает позицию последнего вхождения
+            array = self.position_array(self.objects)
+        else:
+            array = self.positions[self._order]
+        array.setflags(write=False)
+        return array
+    
+    def position_array(self, objects):
+        """Позиции объектов objects в этой ранжировке в виде массива"""
+        position_map = self.position_map
+        return np.array([position_map[obj] for obj in objects], dtype=np.int64).reshape(-1)
+    
+    def positions_of(self, other):
+        """
+        Позиции объектов other.objects в этой ранжировке. Если наборы объектов
+        совпадают, поиск по словарю не нужен — берется object_positions.
+        """
+        if other is self or (len(other.ids) == len(self.ids) and
+                             np.array_equal(other.sorted_ids, self.sorted_ids)):
+            return self.object_positions
+        return self.position_array(other.objects)
+
+PARSE_CACHE_SIZE = 256
+
+_parse_cache = ContentCache(PARSE_CACHE_SIZE)
+
+def parse_ranking(ranking_str):
+    """
+    JSON-строка -> ParsedRanking с LRU-кэшем на PARSE_CACHE_SIZE записей.
+
+    Ключ — хэш содержимого строки (common.cache.content_key), так что повторное
+    сравнение с той же ранжировкой не вызывает ни json.loads, ни разворачивание
+    кластеров.
+    """
+    return _parse_cache.get_or_compute(content_key('task3.ranking', ranking_str),
+                                       lambda: ParsedRanking(json.loads(ranking_str)))
+
+def as_parsed_ranking(ranking):
+    """ParsedRanking из JSON-строки (через кэш) или уже разобранной ранжировки"""
+    if isinstance(ranking, ParsedRanking):
+        return ranking
+    return parse_ranking(ranking)
+
+RANKING_MAGIC = b'RNK1'
+
+RANKING_HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('n_objects', '<i8'), ('n_elements', '<i8')])
+
+def save_ranking_binary(ranking, filename):
+    """
+    Сохраняет ранжировку (JSON-строку, список или ParsedRanking) в двоичный файл:
+    заголовок RANKING_HEADER, границы элементов (int64, n_elements + 1 значение)
+    и номера объектов (int32, n_objects значений) в порядке ранжировки.
 
-def find_core_and_consistent_ranking(ranking_a_str, ranking_b_str):
-    """Основная функция для нахождения ядра противоречий и согласованной ранжировки"""
+    Поддерживаются только целочисленные объекты в диапазоне int32. Одноэлементный
+    кластер [x] сохраняется так же, как объект x.
+    """
+    if isinstance(ranking, list):
+        ranking = ParsedRanking(ranking)
+    ranking = as_parsed_ranking(ranking)
+    ids = ranking.ids
+    if ids.dtype == object or (len(ids) and (ids.min() < np.iinfo(np.int32).min or
+                                             ids.max() > np.iinfo(np.int32).max)):
+        raise ValueError("binary rankings support only int32 object ids")
+    header = np.zeros(1, dtype=RANKING_HEADER)
+    header[0] = (RANKING_MAGIC, 1, len(ids), len(ranking))
+    with open(filename, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(np.ascontiguousarray(ranking.boundaries, dtype='<i8').tobytes())
+        f.write(np.ascontiguousarray(ids, dtype='<i4').tobytes())
+
+def load_ranking_binary(filename):
+    """
+    Открывает двоичную ранжировку через np.memmap: объекты Python не создаются,
+    данные читаются с диска по мере обращения.
+    """
+    header = np.fromfile(filename, dtype=RANKING_HEADER, count=1)
+    if len(header) != 1 or header['magic'][0] != RANKING_MAGIC or header['version'][0] != 1:
+        raise ValueError(f"{filename} is not a binary ranking file")
+    n_objects = int(header['n_objects'][0])
+    n_elements = int(header['n_elements'][0])
+    boundaries = np.memmap(filename, dtype='<i8', mode='r', offset=RANKING_HEADER.itemsize,
+                           shape=(n_elements + 1,))
+    if n_objects:
+        ids = np.memmap(filename, dtype='<i4', mode='r',
+                        offset=RANKING_HEADER.itemsize + boundaries.nbytes, shape=(n_objects,))
+    else:
+        ids = np.empty(0, dtype='<i4')
+    return ParsedRanking.from_arrays(ids, boundaries)
+
+def json_to_binary(json_filename, binary_filename):
+    """Конвертирует ранжировку из JSON-файла в двоичный формат"""
+    with open(json_filename, 'r', encoding='utf-8') as f:
+        save_ranking_binary(ParsedRanking(json.load(f)), binary_filename)
+
+def binary_to_json(binary_filename, json_filename):
+    """Конвертирует двоичную ранжировку обратно в JSON"""
+    with open(json_filename, 'w', encoding='utf-8') as f:
+        json.dump(load_ranking_binary(binary_filename).ranking, f, separators=(',', ':'))
+
+def mark_core_pairs(P, C):
+    """
+    Пары ядра — нули P над диагональью; в C они отмечаются единицами в обе стороны.
+    Возвращает номера объектов пар (core_i, core_j) прямо из np.nonzero.
+    """
+    core_i, core_j = np.nonzero(np.triu(P == 0, k=1))
+    C[core_i, core_j] = C[core_j, core_i] = 1
+    return core_i, core_j
+
+def _first_position_map(ranking):
+    if isinstance(ranking, ParsedRanking):
+        return ranking.first_position_map
+    return first_positions(ranking)
+
+def order_clusters(clusters, ranking_a, ranking_b):
+    """
+    Сортирует кластеры по средней позиции в двух ранжировках.
+
+    Позиция кластера — первый элемент ранжировки, содержащий хоть один его объект,
+    т.е. минимум first_positions по объектам кластера (len(ranking), если ни один
+    не найден). Время O(n) на построение словарей и O(|кластер|) на кластер.
+    """
+    first_a = _first_position_map(ranking_a)
+    first_b = _first_position_map(ranking_b)
+    missing_a = len(ranking_a)
+    missing_b = len(ranking_b)
     
-    ranking_a = json.loads(ranking_a_str)
-    ranking_b = json.loads(ranking_b_str)
+    def cluster_key(cluster):
+        pos_a = min(first_a.get(obj, missing_a) for obj in cluster)
+        pos_b = min(first_b.get(obj, missing_b) for obj in cluster)
+        return (pos_a + pos_b) / 2
     
-    objects = flatten_ranking(ranking_a)
+    return sorted(clusters, key=cluster_key)
+
+def equivalence_clusters(E):
+    """
+    Классы эквивалентности для симметричной матрицы E — компоненты связности графа E.
+
+    Совпадают с классами транзитивного замыкания E*, но вместо тройного цикла
+    Флойда-Уоршелла (O(n^3)) каждый узел просматривается один раз. Компоненты
+    возвращаются в порядке наименьшего номера узла.
+    """
+    n = len(E)
+    visited = np.zeros(n, dtype=bool)
+    clusters = []
+    for i in range(n):
+        if visited[i]:
+            continue
+        visited[i] = True
+        cluster = [i]
+        stack = [i]
+        while stack:
+            node = stack.pop()
+            new = np.nonzero(E[node] & ~visited)[0]
+            visited[new] = True
+            cluster.extend(new.tolist())
+            stack.extend(new.tolist())
+        clusters.append(cluster)
+    return clusters
+
+def _core_levels(pos_a, pos_b):
+    """
+    Уровни восходящей сортировки слиянием для iter_core_blocks и count_core_pairs.
+
+    Выдает (left_ids, right_ids, starts, counts): элемент right_ids[k] правого блока
+    образует пары ядра с left_ids[starts[k]:starts[k] + counts[k]]. Нулевые counts
+    отброшены.
+    """
+    n = len(pos_a)
+    if n < 2:
+        return
+    ids = np.lexsort((-pos_b, pos_a))
+    vals = pos_b[ids]
+    span = int(vals.max()) + 1
+    index = np.arange(n)
+    width = 1
+    while width < n:
+        block = index // width
+        pair = block // 2
+        is_left = block % 2 == 0
+        left_keys = pair[is_left] * span + vals[is_left]
+        right = np.nonzero(~is_left)[0]
+        starts = np.searchsorted(left_keys, pair[right] * span, side='left')
+        ends = np.searchsorted(left_keys, pair[right] * span + vals[right], side='left')
+        counts = ends - starts
+        nonzero = np.nonzero(counts)[0]
+        yield ids[is_left], ids[right[nonzero]], starts[nonzero], counts[nonzero]
+        width *= 2
+        order = np.argsort((index // width) * span + vals, kind='stable')
+        vals = vals[order]
+        ids = ids[order]
+
+def iter_core_blocks(pos_a, pos_b, max_pairs=1 << 20):
+    """
+    Перебирает пары ядра противоречий по массивам позиций, не строя матриц n x n.
+
+    Пара (i, j) попадает в ядро (P[i][j] == 0), когда объекты строго упорядочены
+    в A и B одинаково: pos_a[i] < pos_a[j] и pos_b[i] < pos_b[j] (или оба >).
+    Объекты сортируются по (pos_a, -pos_b), после чего пары ядра — это пары
+    позиций p < q с B[p] < B[q]. Они перечисляются восходящей сортировкой
+    слиянием: на каждом уровне для элемента правого блока подходящие элементы
+    левого блока образуют префикс, найденный бинарным поиском.
+
+    Выдает блоки (first, second) — массивы номеров объектов длины меньше
+    max_pairs + n; first[k] стоит раньше second[k] в ранжировке A.
+    Время O(n log^2 n + |ядро|), дополнительная память O(n + max_pairs).
+    """
+    for left_ids, right_ids, starts, counts in _core_levels(pos_a, pos_b):
+        # Блоки по ~max_pairs пар: элементы группируются по смещению их первой пары
+        first_pair = np.cumsum(counts) - counts
+        bounds = np.nonzero(np.diff(first_pair // max_pairs))[0] + 1
+        for lo, hi in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(right_ids)]])):
+            if lo >= hi:
+                continue
+            chunk_counts = counts[lo:hi]
+            total = int(chunk_counts.sum())
+            offsets = np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+            positions = np.repeat(starts[lo:hi], chunk_counts) + np.arange(total) - offsets
+            yield left_ids[positions], np.repeat(right_ids[lo:hi], chunk_counts)
+
+def count_core_pairs(pos_a, pos_b):
+    """Размер ядра противоречий без перечисления пар: O(n log^2 n) времени, O(n) памяти"""
+    return sum(int(counts.sum()) for _, _, _, counts in _core_levels(pos_a, pos_b))
+
+def core_pairs(pos_a, pos_b):
+    """Пары ядра (i, j), i < j, в том же порядке, что и при обходе матрицы P по строкам"""
+    firsts, seconds = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for first, second in iter_core_blocks(pos_a, pos_b):
+        firsts.append(np.minimum(first, second))
+        seconds.append(np.maximum(first, second))
+    core_i = np.concatenate(firsts)
+    core_j = np.concatenate(seconds)
+    order = np.lexsort((core_j, core_i))
+    return core_i[order], core_j[order]
+
+def consistent_clusters(pos_a, pos_b):
+    """
+    Кластеры согласованной ранжировки без матриц: объекты i и j эквивалентны, если
+    пара входит в ядро или у них совпадают обе позиции, а также по транзитивности.
+
+    В порядке сортировки по (pos_a по убыванию, pos_b по возрастанию) пары ядра —
+    это инверсии последовательности pos_b, а компоненты графа инверсий —
+    непрерывные отрезки: граница проходит там, где максимум префикса не больше
+    минимума суффикса. Объекты с одинаковыми (pos_a, pos_b) стоят рядом и
+    границей не разделяются.
+
+    Кластеры упорядочены, как в find_core_and_consistent_ranking: по средней из
+    наименьших позиций в A и B, при равенстве — по наименьшему номеру объекта.
+    Возвращает (members, offsets): номера объектов k-го кластера (по возрастанию) —
+    members[offsets[k]:offsets[k + 1]]. O(n log n).
+    """
+    n = len(pos_a)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    order = np.lexsort((pos_b, -pos_a))
+    seq = pos_b[order]
+    prefix_max = np.maximum.accumulate(seq)
+    suffix_min = np.minimum.accumulate(seq[::-1])[::-1]
+    cut = prefix_max[:-1] <= suffix_min[1:]
+    same = (pos_a[order][:-1] == pos_a[order][1:]) & (seq[:-1] == seq[1:])
+    starts = np.concatenate([[0], np.nonzero(cut & ~same)[0] + 1])
+
+    # Кластеры — отрезки последовательности order, поэтому минимумы по кластерам
+    # считаются одним reduceat
+    keys = np.minimum.reduceat(pos_a[order], starts) + np.minimum.reduceat(seq, starts)
+    first_member = np.minimum.reduceat(order, starts)
+    rank = np.empty(len(starts), dtype=np.int64)
+    rank[np.lexsort((first_member, keys))] = np.arange(len(starts))
+
+    cluster_of = np.repeat(rank, np.diff(np.append(starts, n)))
+    members = order[np.lexsort((order, cluster_of))]
+    offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cluster_of, minlength=len(starts)), out=offsets[1:])
+    return members, offsets
+
+CORE_MODES = ('list', 'iter', 'blocks', 'count')
+
+def iter_core_label_blocks(pos_a, pos_b, labels, max_pairs=1 << 20):
+    """
+    Блоки ядра (first, second) в виде массивов меток labels[i], labels[j], i < j,
+    как в core_pairs, но без сортировки и без накопления всех пар в памяти.
+    """
+    for first, second in iter_core_blocks(pos_a, pos_b, max_pairs):
+        yield labels[np.minimum(first, second)], labels[np.maximum(first, second)]
+
+def _iter_core_pairs(blocks):
+    for first, second in blocks:
+        for pair in zip(first.tolist(), second.tolist()):
+            yield list(pair)
+
+def _sparse_core_and_clusters(ranking_a, ranking_b, objects, core='list'):
+    """Ядро и кластеры по массивам позиций: O(n log^2 n + |ядро|) времени, O(n) памяти"""
+    pos_a = ranking_a.object_positions
+    pos_b = ranking_b.positions_of(ranking_a)
+    
+    if core == 'count':
+        core = count_core_pairs(pos_a, pos_b)
+    elif core == 'blocks':
+        core = iter_core_label_blocks(pos_a, pos_b, ranking_a.sorted_ids)
+    elif core == 'iter':
+        core = _iter_core_pairs(iter_core_label_blocks(pos_a, pos_b, ranking_a.sorted_ids))
+    else:
+        core_i, core_j = core_pairs(pos_a, pos_b)
+        core = [[objects[i], objects[j]] for i, j in zip(core_i.tolist(), core_j.tolist())]
+    
+    members, offsets = consistent_clusters(pos_a, pos_b)
+    members = members.tolist()
+    offsets = offsets.tolist()
+    clusters = [[objects[node] for node in members[lo:hi]] for lo, hi in zip(offsets, offsets[1:])]
+    return core, clusters
+
+def find_core_and_consistent_ranking(ranking_a_str, ranking_b_str, sparse=False, core='list'):
+    """
+    Основная функция для нахождения ядра противоречий и согласованной ранжировки
+
+    Ранжировки передаются JSON-строками или объектами ParsedRanking; строки
+    разбираются через кэш parse_ranking.
+
+    При sparse=True матрицы n x n не строятся: ядро и кластеры находятся
+    сортировкой массивов позиций (iter_core_blocks, consistent_clusters).
+    Результат совпадает с матричным вариантом.
+
+    core задает вид ядра в результате:
+    - 'list' — список пар [i, j] в порядке обхода матрицы P по строкам;
+    - 'iter' — генератор тех же пар, выдаваемых по мере нахождения;
+    - 'blocks' — генератор блоков (first, second) — массивов NumPy с метками;
+    - 'count' — только число пар.
+    В режимах 'iter' и 'blocks' порядок пар другой, а память не зависит от
+    размера ядра; при core != 'list' всегда используется путь без матриц.
+    """
+    if core not in CORE_MODES:
+        raise ValueError(f"core must be one of {CORE_MODES}, got {core!r}")
     
-    Y_A = ranking_to_matrix(ranking_a, objects)
-    Y_B = ranking_to_matrix(ranking_b, objects)
+    ranking_a = as_parsed_ranking(ranking_a_str)
+    ranking_b = as_parsed_ranking(ranking_b_str)
+    
+    objects = ranking_a.objects
+    
+    if sparse or core != 'list':
+        core, clusters = _sparse_core_and_clusters(ranking_a, ranking_b, objects, core)
+        return {
+            "core": core,
+            "consistent_ranking": [cluster[0] if len(cluster) == 1 else cluster
+                                   for cluster in clusters]
+        }
+    
+    pos_a = ranking_a.object_positions
+    pos_b = ranking_b.positions_of(ranking_a)
+    Y_A = (pos_a[:, None] <= pos_a[None, :]).astype(int)
+    Y_B = (pos_b[:, None] <= pos_b[None, :]).astype(int)
     
     Y_A_T = Y_A.T
     Y_B_T = Y_B.T
     
     P = (Y_A & Y_B_T) | (Y_A_T & Y_B)
     
-    core = []
-    n = len(objects)
-    for i in range(n):
-        for j in range(i + 1, n):
-            if P[i][j] == 0:
-                core.append([objects[i], objects[j]])
-    
     C = Y_A & Y_B
     
-    for pair in core:
-        i = objects.index(pair[0])
-        j = objects.index(pair[1])
-        C[i][j] = C[j][i] = 1
+    core_i, core_j = mark_core_pairs(P, C)
+    core = [[objects[i], objects[j]] for i, j in zip(core_i.tolist(), core_j.tolist())]
     
-    E = C & C.T
+    E = (C & C.T).astype(bool)
     
-    E_star = E.copy()
-    for k in range(n):
-        for i in range(n):
-            for j in range(n):
-                if E_star[i][k] and E_star[k][j]:
-                    E_star[i][j] = 1
+    clusters = [sorted(objects[node] for node in cluster)
+                for cluster in equivalence_clusters(E)]
     
-    clusters = []
-    visited = [False] * n
-    
-    for i in range(n):
-        if not visited[i]:
-            cluster = []
-            stack = [i]
-            visited[i] = True
-            
-            while stack:
-                node = stack.pop()
-                cluster.append(objects[node])
-                for j in range(n):
-                    if E_star[node][j] and not visited[j]:
-                        visited[j] = True
-                        stack.append(j)
-            
-            clusters.append(sorted(cluster))
-    
-    def get_cluster_position(cluster, ranking):
-        """Находит позицию кластера в ранжировке"""
-        for pos, item in enumerate(ranking):
-            item_list = item if isinstance(item, list) else [item]
-            if any(obj in item_list for obj in cluster):
-                return pos
-        return len(ranking)
-    
-    clusters.sort(key=lambda cluster: 
-                 (get_cluster_position(cluster, ranking_a) + 
-                  get_cluster_position(cluster, ranking_b)) / 2)
+    clusters = order_clusters(clusters, ranking_a, ranking_b)
     
     consistent_ranking = []
     for cluster in clusters:
@@ -113,6 +508,70 @@ def find_core_and_consistent_ranking(ranking_a_str, ranking_b_str):
         "consistent_ranking": consistent_ranking
     }
 
+def aggregate_rankings(ranking_strs):
+    """
+    Согласование N экспертных ранжировок за один проход.
+
+    Все ранжировки разбираются один раз, позиции складываются в матрицу (N, n).
+    Для каждой пары экспертов (k, l), k < l, ядро противоречий считается по
+    строкам этой матрицы (core_pairs). Согласованная ранжировка обобщает
+    случай двух ранжировок: объекты эквивалентны, если они равны у всех экспертов
+    или пара входит в ядро хотя бы одной пары экспертов (т.е. хотя бы двое
+    экспертов строго упорядочили ее одинаково); кластеры упорядочены по средней
+    по экспертам позиции. Для N = 2 результат совпадает с
+    find_core_and_consistent_ranking.
+
+    Возвращает словарь с ядрами по парам экспертов, согласованной ранжировкой и
+    матрицей согласия agreement[i][j] — числом экспертов, у которых i не хуже j
+    (наименьший беззнаковый тип, вмещающий N: uint8 при N <= 255).
+    """
+    rankings = [as_parsed_ranking(ranking_str) for ranking_str in ranking_strs]
+    count_dtype = np.min_scalar_type(len(rankings))
+    if not rankings:
+        return {"cores": {}, "consistent_ranking": [], "agreement": np.zeros((0, 0), dtype=count_dtype)}
+    
+    objects = rankings[0].objects
+    positions = np.array([ranking.positions_of(rankings[0]) for ranking in rankings],
+                         dtype=np.int64).reshape(len(rankings), len(objects))
+    m, n = positions.shape
+    
+    cores = {}
+    for k in range(m):
+        for l in range(k + 1, m):
+            core_i, core_j = core_pairs(positions[k], positions[l])
+            cores[(k, l)] = [[objects[i], objects[j]] for i, j in zip(core_i.tolist(), core_j.tolist())]
+    
+    # Число строгих порядков нужно только в виде «не меньше двух», поэтому
+    # вместо счетчика — два булевых накопителя: «хотя бы один» и «хотя бы два»
+    agreement = np.zeros((n, n), dtype=count_dtype)
+    before_once = np.zeros((n, n), dtype=bool)
+    before_twice = np.zeros((n, n), dtype=bool)
+    for pos in positions:
+        not_worse = pos[:, None] <= pos[None, :]
+        agreement += not_worse
+        strictly_before = ~not_worse.T
+        before_twice |= before_once & strictly_before
+        before_once |= strictly_before
+    
+    in_any_core = before_twice | before_twice.T
+    tied_everywhere = (agreement == m) & (agreement.T == m)
+    E = in_any_core | tied_everywhere
+    
+    clusters = equivalence_clusters(E)
+    keys = [positions[:, cluster].min(axis=1).sum() for cluster in clusters]
+    order = sorted(range(len(clusters)), key=keys.__getitem__)
+    
+    consistent_ranking = []
+    for k in order:
+        cluster = sorted(objects[node] for node in clusters[k])
+        consistent_ranking.append(cluster[0] if len(cluster) == 1 else cluster)
+    
+    return {
+        "cores": cores,
+        "consistent_ranking": consistent_ranking,
+        "agreement": agreement
+    }
+
 if __name__ == "__main__":
     ranking_a = '[1,[2,3],4,[5,6,7],8,9,10]'
     ranking_b = '[[1,2],[3,4,5],6,7,9,[8,10]]'
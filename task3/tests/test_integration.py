@@ -2,8 +2,13 @@
 Интеграционные тесты для проверки работы с реальными данными
 """
 import json
+import os
 import pytest
-from task3.task3 import find_core_and_consistent_ranking
+import numpy as np
+from task3.task3 import find_core_and_consistent_ranking, aggregate_rankings
+from task3.all_pairs import load_rankings, position_matrix, iter_all_pairs, main as all_pairs_main
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
 
 
 class TestIntegrationWithFiles:
@@ -280,5 +285,82 @@ class TestSpecialCases:
         assert all_objects == {1, 2, 3, 4, 5, 6}
 
 
+class TestMultiExpert:
+    """Тесты согласования нескольких ранжировок"""
+    
+    def _load(self, name):
+        with open(os.path.join(DATA_DIR, name), 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def test_two_rankings_match_pairwise(self):
+        """Для двух экспертов результат совпадает с попарной функцией"""
+        ranking_a = self._load('Ранжировка  A.json')
+        ranking_b = self._load('Ранжировка  B.json')
+        
+        pairwise = find_core_and_consistent_ranking(ranking_a, ranking_b)
+        aggregated = aggregate_rankings([ranking_a, ranking_b])
+        
+        assert aggregated["cores"][(0, 1)] == pairwise["core"]
+        assert aggregated["consistent_ranking"] == pairwise["consistent_ranking"]
+    
+    def test_three_experts_from_files(self):
+        """Ранжировки A, B и C из data/"""
+        rankings = [self._load(f'Ранжировка  {name}.json') for name in 'ABC']
+        result = aggregate_rankings(rankings)
+        
+        assert set(result["cores"]) == {(0, 1), (0, 2), (1, 2)}
+        for (k, l), core in result["cores"].items():
+            assert core == find_core_and_consistent_ranking(rankings[k], rankings[l])["core"]
+        
+        all_objects = set()
+        for item in result["consistent_ranking"]:
+            if isinstance(item, list):
+                all_objects.update(item)
+            else:
+                all_objects.add(item)
+        assert all_objects == set(range(1, 11))
+        
+        # Каждый объект не хуже себя у всех трех экспертов
+        assert (result["agreement"].diagonal() == 3).all()
+        assert result["agreement"].dtype == np.uint8
+
+
+
+class TestAllPairs:
+    """Тесты попарного сравнения ранжировок каталога"""
+    
+    def _expected(self):
+        names, rankings = load_rankings(DATA_DIR, 'Ранжировка*')
+        expected = {}
+        for k in range(len(names)):
+            for l in range(k + 1, len(names)):
+                result = find_core_and_consistent_ranking(rankings[k], rankings[l])
+                expected[(k, l)] = (len(result["core"]), result["consistent_ranking"])
+        return names, rankings, expected
+    
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_matches_pairwise(self, processes):
+        """Каждая пара совпадает с find_core_and_consistent_ranking"""
+        names, rankings, expected = self._expected()
+        names, positions, objects = position_matrix(names, rankings)
+        
+        results = {(k, l): (core_size, ranking)
+                   for k, l, core_size, ranking in iter_all_pairs(positions, objects, processes)}
+        
+        assert results == expected
+    
+    def test_cli_writes_json_lines(self, tmp_path):
+        """Командная строка пишет по строке JSON на пару"""
+        output = tmp_path / 'pairs.jsonl'
+        all_pairs_main([DATA_DIR, '--pattern', 'Ранжировка*', '-p', '1', '-o', str(output)])
+        
+        lines = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+        assert [(line["a"], line["b"]) for line in lines] == [
+            ('Ранжировка  A.json', 'Ранжировка  B.json'),
+            ('Ранжировка  A.json', 'Ранжировка  C.json'),
+            ('Ранжировка  B.json', 'Ранжировка  C.json'),
+        ]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
@@ -1,7 +1,10 @@
 import json
 import pytest
 import numpy as np
-from task3.task3 import flatten_ranking, ranking_to_matrix, find_core_and_consistent_ranking
+from task3.task3 import (flatten_ranking, ranking_to_matrix, find_core_and_consistent_ranking,
+                         core_pairs, consistent_clusters, ParsedRanking, parse_ranking,
+                         save_ranking_binary, load_ranking_binary, json_to_binary, binary_to_json,
+                         count_core_pairs)
 
 
 class TestFlattenRanking:
@@ -336,5 +339,183 @@ class TestEdgeCases:
         assert set(result["consistent_ranking"][0]) == {1, 2, 3, 4}
 
 
+class TestSparseMode:
+    """Тесты режима без матриц n x n (sparse=True)"""
+    
+    CASES = [
+        ('[1,[2,3],4,[5,6,7],8,9,10]', '[[1,2],[3,4,5],6,7,9,[8,10]]'),
+        ('[1, 2, 3, 4]', '[1, 2, 3, 4]'),
+        ('[1, 2, 3, 4]', '[2, 1, 4, 3]'),
+        ('[[1,2], [3,4], 5, 6]', '[[3,4], [1,2], 6, 5]'),
+        ('[[1,2,3,4]]', '[[1,2,3,4]]'),
+        ('["a", "b", "c"]', '["a", "c", "b"]'),
+        ('[]', '[]'),
+    ]
+    
+    def test_matches_dense(self):
+        """Результат совпадает с матричным вариантом"""
+        for ranking_a, ranking_b in self.CASES:
+            dense = find_core_and_consistent_ranking(ranking_a, ranking_b)
+            sparse = find_core_and_consistent_ranking(ranking_a, ranking_b, sparse=True)
+            assert dense == sparse, f"Failed for {ranking_a} vs {ranking_b}"
+    
+    def test_core_pairs(self):
+        """Ядро — пары, строго одинаково упорядоченные в обеих ранжировках"""
+        pos_a = np.array([0, 1, 2, 3])
+        pos_b = np.array([1, 0, 3, 2])
+        core_i, core_j = core_pairs(pos_a, pos_b)
+        
+        assert list(zip(core_i.tolist(), core_j.tolist())) == [(0, 2), (0, 3), (1, 2), (1, 3)]
+    
+    def test_consistent_clusters(self):
+        """Кластеры и их порядок по массивам позиций"""
+        pos_a = np.array([0, 1, 2])
+        pos_b = np.array([2, 1, 0])
+        members, offsets = consistent_clusters(pos_a, pos_b)
+        
+        assert members.tolist() == [0, 1, 2]
+        assert offsets.tolist() == [0, 1, 2, 3]
+    
+    def test_large_reversed(self):
+        """Почти обратные ранжировки из 100 000 объектов"""
+        n = 100_000
+        elements = list(range(n))
+        reversed_elements = elements[::-1]
+        reversed_elements[0], reversed_elements[1] = reversed_elements[1], reversed_elements[0]
+        
+        result = find_core_and_consistent_ranking(json.dumps(elements), json.dumps(reversed_elements),
+                                                  sparse=True)
+        
+        assert result["core"] == [[n - 2, n - 1]]
+        assert len(result["consistent_ranking"]) == n - 1
+
+
+
+class TestCoreModes:
+    """Тесты потоковых режимов выдачи ядра"""
+    
+    RANKING_A = '[1,[2,3],4,[5,6,7],8,9,10]'
+    RANKING_B = '[[1,2],[3,4,5],6,7,9,[8,10]]'
+    
+    def test_iter_yields_same_pairs(self):
+        """Генератор выдает те же пары, что и список"""
+        expected = find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B)
+        result = find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B, core='iter')
+        
+        assert not isinstance(result["core"], list)
+        assert sorted(result["core"]) == sorted(expected["core"])
+        assert result["consistent_ranking"] == expected["consistent_ranking"]
+    
+    def test_blocks_are_arrays(self):
+        """Блоки — массивы NumPy с метками объектов"""
+        expected = find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B)
+        result = find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B, core='blocks')
+        
+        pairs = []
+        for first, second in result["core"]:
+            assert isinstance(first, np.ndarray) and isinstance(second, np.ndarray)
+            pairs.extend([i, j] for i, j in zip(first.tolist(), second.tolist()))
+        assert sorted(pairs) == sorted(expected["core"])
+    
+    def test_count(self):
+        """Режим count возвращает только размер ядра"""
+        expected = find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B)
+        result = find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B, core='count')
+        
+        assert result["core"] == len(expected["core"])
+    
+    def test_count_quadratic_core(self):
+        """Одинаковые ранжировки: ядро из n(n-1)/2 пар считается без перечисления"""
+        n = 100_000
+        pos = np.arange(n)
+        
+        assert count_core_pairs(pos, pos) == n * (n - 1) // 2
+    
+    def test_unknown_mode(self):
+        """Неизвестный режим — ошибка"""
+        with pytest.raises(ValueError):
+            find_core_and_consistent_ranking(self.RANKING_A, self.RANKING_B, core='set')
+
+
+class TestParsedRanking:
+    """Тесты разобранной ранжировки и кэша разбора"""
+    
+    def test_arrays(self):
+        """Объекты, позиции и границы элементов ранжировки"""
+        parsed = ParsedRanking([3, [1, 2], 4])
+        
+        assert parsed.ids.tolist() == [3, 1, 2, 4]
+        assert parsed.positions.tolist() == [0, 1, 1, 2]
+        assert parsed.boundaries.tolist() == [0, 1, 3, 4]
+        assert parsed.objects == [1, 2, 3, 4]
+        assert parsed.position_array(parsed.objects).tolist() == [1, 1, 0, 2]
+    
+    def test_ranking_rebuilt_from_arrays(self):
+        """Список ranking не хранится, а строится из ids и boundaries"""
+        ranking = [3, [1, 2], 4, [5, 6, 7]]
+        parsed = ParsedRanking(ranking)
+        
+        assert parsed.ranking == ranking
+        assert parsed.ranking is not ranking
+        assert all(value is not ranking for value in vars(parsed).values())
+    
+    def test_cache_returns_same_object(self):
+        """Повторный разбор той же строки берется из кэша"""
+        ranking = json.dumps([[10, 20], 30, 40])
+        
+        assert parse_ranking(ranking) is parse_ranking(ranking)
+        assert parse_ranking(ranking) is not parse_ranking(ranking + ' ')
+    
+    def test_parsed_input_matches_string(self):
+        """ParsedRanking и JSON-строка дают одинаковый результат"""
+        ranking_a = '[1,[2,3],4,[5,6,7],8,9,10]'
+        ranking_b = '[[1,2],[3,4,5],6,7,9,[8,10]]'
+        expected = find_core_and_consistent_ranking(ranking_a, ranking_b)
+        reference = ParsedRanking(json.loads(ranking_a))
+        
+        assert find_core_and_consistent_ranking(reference, ranking_b) == expected
+        assert find_core_and_consistent_ranking(reference, ParsedRanking(json.loads(ranking_b)),
+                                                sparse=True) == expected
+
+    
+    def test_binary_round_trip(self, tmp_path):
+        """JSON -> двоичный формат -> JSON сохраняет ранжировку"""
+        json_file = tmp_path / 'ranking.json'
+        json_file.write_text('[[1,2],[3,4,5],6,7,9,[8,10]]', encoding='utf-8')
+        
+        json_to_binary(json_file, tmp_path / 'ranking.rnk')
+        binary_to_json(tmp_path / 'ranking.rnk', tmp_path / 'back.json')
+        
+        assert json.loads((tmp_path / 'back.json').read_text(encoding='utf-8')) == \
+            [[1, 2], [3, 4, 5], 6, 7, 9, [8, 10]]
+    
+    def test_binary_ranking_comparison(self, tmp_path):
+        """Ранжировки из двоичных файлов дают тот же результат, что и JSON"""
+        ranking_a = '[1,[2,3],4,[5,6,7],8,9,10]'
+        ranking_b = '[[1,2],[3,4,5],6,7,9,[8,10]]'
+        save_ranking_binary(ranking_a, tmp_path / 'a.rnk')
+        save_ranking_binary(ranking_b, tmp_path / 'b.rnk')
+        
+        parsed_a = load_ranking_binary(tmp_path / 'a.rnk')
+        parsed_b = load_ranking_binary(tmp_path / 'b.rnk')
+        
+        assert isinstance(parsed_a.ids, np.memmap)
+        assert find_core_and_consistent_ranking(parsed_a, parsed_b) == \
+            find_core_and_consistent_ranking(ranking_a, ranking_b)
+    
+    def test_binary_rejects_non_integer_ids(self, tmp_path):
+        """Двоичный формат хранит только целые номера объектов"""
+        with pytest.raises(ValueError):
+            save_ranking_binary('["a", "b"]', tmp_path / 'bad.rnk')
+    
+    def test_load_rejects_other_files(self, tmp_path):
+        """Файл без заголовка ранжировки не загружается"""
+        path = tmp_path / 'other.rnk'
+        path.write_bytes(b'not a ranking file at all')
+        
+        with pytest.raises(ValueError):
+            load_ranking_binary(path)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])